@@ -0,0 +1,56 @@
+"""
+Benchmark parsing URLs into a URLBatch against creating a URL per string,
+then counting the URLs per host.
+
+Run with::
+
+    $ python benchmarks/bench_batch.py
+"""
+from __future__ import print_function
+
+from collections import Counter
+import random
+import time
+import tracemalloc
+
+from purl import URL, URLBatch
+
+
+def build_strings(number):
+    rng = random.Random(0)
+    return ['https://www.example%d.com/category/%d/item-%d?page=%d&sort=price'
+            % (rng.randrange(100), rng.randrange(100), i, rng.randrange(20))
+            for i in range(number)]
+
+
+def parse_objects(strings):
+    urls = [URL(s) for s in strings]
+    return urls, Counter(u.host() for u in urls)
+
+
+def parse_batch(strings):
+    batch = URLBatch(strings)
+    return batch, Counter(batch.hosts())
+
+
+def run(number=200000):
+    strings = build_strings(number)
+    print("Parsing and grouping %d URLs by host:" % number)
+    for name, parse in (('URL objects', parse_objects),
+                        ('URLBatch', parse_batch)):
+        start = time.time()
+        parse(strings)
+        elapsed = time.time() - start
+
+        # Measured separately as tracing slows allocation down
+        tracemalloc.start()
+        parsed = parse(strings)
+        used = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del parsed
+        print("  %-12s %.3fs, %.0f bytes per URL" % (
+            name, elapsed, float(used) / number))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,50 @@
+"""
+Compare the memory used by URL and CompactURL instances, measured with
+tracemalloc, and the cost of reading components from each.
+
+Run with::
+
+    $ python benchmarks/bench_memory.py
+"""
+from __future__ import print_function
+
+import random
+import time
+import tracemalloc
+
+from purl import CompactURL, URL
+
+
+def build_strings(number):
+    rng = random.Random(0)
+    return ['https://www.example%d.com/category/%d/item-%d?page=%d&sort=price'
+            % (rng.randrange(1000), rng.randrange(100), i, rng.randrange(20))
+            for i in range(number)]
+
+
+def measure(factory, strings):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    urls = [factory(s) for s in strings]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return urls, float(used) / len(strings)
+
+
+def run(number=50000):
+    # The strings are built up front so their memory isn't counted; a
+    # CompactURL keeps its own copy of the serialised string.
+    strings = build_strings(number)
+    for name, factory in (('URL', URL), ('CompactURL', CompactURL)):
+        urls, per_instance = measure(factory, strings)
+        start = time.time()
+        for u in urls:
+            u.host()
+            u.path()
+        elapsed = time.time() - start
+        print("%-10s %4.0f bytes per URL, host() + path() %.2fus" % (
+            name, per_instance, elapsed / number * 1e6))
+
+
+if __name__ == '__main__':
+    run()
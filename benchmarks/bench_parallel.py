@@ -0,0 +1,41 @@
+"""
+Benchmark how parse_many scales with the number of worker processes.
+
+Run with::
+
+    $ python benchmarks/bench_parallel.py
+"""
+from __future__ import print_function
+
+import os
+import random
+import time
+
+from purl import parse_many
+
+
+def build_strings(number):
+    rng = random.Random(0)
+    return ['https://www.example%d.com/category/%d/item-%d?page=%d&sort=price'
+            % (rng.randrange(100), rng.randrange(100), i, rng.randrange(20))
+            for i in range(number)]
+
+
+def run(number=400000, chunksize=20000):
+    strings = build_strings(number)
+    cpus = os.cpu_count() or 1
+    workers = 1
+    while True:
+        start = time.time()
+        batch = parse_many(strings, workers=workers, chunksize=chunksize)
+        elapsed = time.time() - start
+        assert len(batch) == number
+        print("%2d workers: %.2fs, %.0f URLs/s" % (
+            workers, elapsed, number / elapsed))
+        if workers >= cpus:
+            break
+        workers = min(workers * 2, cpus)
+
+
+if __name__ == '__main__':
+    run()
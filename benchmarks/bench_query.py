@@ -0,0 +1,61 @@
+"""
+Benchmark stripping tracking parameters from URLs.
+
+Compares a compiled ``QueryFilter`` with calling ``remove_query_param`` for
+each tracking parameter present.
+
+Run with::
+
+    $ python benchmarks/bench_query.py
+"""
+from __future__ import print_function
+
+import random
+import time
+
+from purl import QueryFilter, URL
+
+NAMES = ['fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'yclid',
+         '_ga', '_gl', 'igshid', 'ref_src', 'spm']
+PREFIXES = ['utm_', 'pk_', 'hsa_']
+
+
+def build_urls(number):
+    rng = random.Random(0)
+    tracking = NAMES + [p + 'source' for p in PREFIXES] + ['utm_medium']
+    urls = []
+    for i in range(number):
+        params = ['id=%d' % i, 'page=%d' % rng.randrange(10)]
+        params += ['%s=%x' % (key, rng.getrandbits(32))
+                   for key in rng.sample(tracking, rng.randrange(5))]
+        rng.shuffle(params)
+        urls.append('http://example.com/item/%d?%s' % (i, '&'.join(params)))
+    return urls
+
+
+def strip_one_by_one(u):
+    for key in list(u.query_params()):
+        if key in NAMES or key.startswith(tuple(PREFIXES)):
+            u = u.remove_query_param(key)
+    return u
+
+
+def run(number=20000):
+    urls = build_urls(number)
+    query_filter = QueryFilter(names=NAMES, prefixes=PREFIXES)
+
+    start = time.time()
+    expected = [strip_one_by_one(URL(u)).as_string() for u in urls]
+    naive = time.time() - start
+
+    start = time.time()
+    cleaned = [u.as_string() for u in query_filter.apply_many(urls)]
+    compiled = time.time() - start
+    assert cleaned == expected
+
+    print("Cleaning %d URLs: remove_query_param %.3fs, QueryFilter %.3fs" % (
+        number, naive, compiled))
+
+
+if __name__ == '__main__':
+    run()
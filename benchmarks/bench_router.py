@@ -0,0 +1,81 @@
+"""
+Benchmark resolving URLs against 10,000 routes.
+
+Compares the trie-based router with trying each template's match in turn.
+
+Run with::
+
+    $ python benchmarks/bench_router.py
+"""
+from __future__ import print_function
+
+import random
+import time
+
+from purl import Router, Template
+
+RESOURCES = ['users', 'groups', 'orders', 'invoices', 'products']
+
+
+def build_templates(count):
+    templates = []
+    for i in range(count):
+        resource = RESOURCES[i % len(RESOURCES)]
+        templates.append(
+            '/api/v%d/%s%d/{id}/items{/item_id}{?page}' % (i % 4, resource, i))
+    return templates
+
+
+def build_urls(count, number):
+    rng = random.Random(0)
+    urls = []
+    for _ in range(number):
+        i = rng.randrange(count)
+        resource = RESOURCES[i % len(RESOURCES)]
+        urls.append('/api/v%d/%s%d/%d/items/%d?page=2' % (
+            i % 4, resource, i, rng.randrange(1000), rng.randrange(1000)))
+    return urls
+
+
+def run(count=10000, number=2000):
+    templates = [Template(t) for t in build_templates(count)]
+    urls = build_urls(count, number)
+
+    router = Router()
+    start = time.time()
+    for template in templates:
+        router.add(template)
+    print("Indexed %d routes in %.3fs" % (count, time.time() - start))
+
+    # Each template's matcher is compiled the first time it's a candidate
+    start = time.time()
+    for u in urls:
+        assert router.resolve(u) is not None
+    cold = time.time() - start
+
+    start = time.time()
+    for u in urls:
+        assert router.resolve(u) is not None
+    trie = time.time() - start
+
+    # A linear scan is too slow to run over every URL.  Compile every
+    # matcher first so only the matching is timed.
+    for template in templates:
+        template.match('')
+    sample = urls[:20]
+    start = time.time()
+    for u in sample:
+        for template in templates:
+            if template.match(u) is not None:
+                break
+    linear = (time.time() - start) / len(sample) * len(urls)
+
+    print("Resolving %d URLs: trie %.3fs (%.3fs compiling matchers on first "
+          "use), linear scan %.3fs (estimated)" % (
+              number, trie, cold, linear))
+    print("Per URL: trie %.1fus, linear scan %.1fus" % (
+        trie / number * 1e6, linear / number * 1e6))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,79 @@
+"""
+Benchmarks for URL template expansion.
+
+Run with::
+
+    $ python benchmarks/bench_template.py
+"""
+from __future__ import print_function
+
+import timeit
+
+from purl import template
+
+TEMPLATES = [
+    'http://example.com{+path,x}/here',
+    'https://api.github.com/repos/{owner}/{repo}/labels{/name}',
+    'http://example.com/search{?q,lang,page}',
+    'http://example.com{/list*,path:4}{?keys*}{#var}',
+]
+
+VARIABLES = {
+    'owner': 'codeinthehole',
+    'repo': 'purl',
+    'name': 'bug',
+    'path': '/foo/bar',
+    'x': 1024,
+    'q': 'search term',
+    'lang': 'en',
+    'page': 2,
+    'var': 'value',
+    'list': ['red', 'green', 'blue'],
+    'keys': [('semi', ';'), ('dot', '.'), ('comma', ',')],
+}
+
+
+def run(number=20000):
+    print("%-60s %12s %12s %12s" % (
+        'template', 'parse (s)', 'cached (s)', 'compiled (s)'))
+    for tpl in TEMPLATES:
+        nodes = template.Template(tpl)._nodes
+        uncompiled = timeit.timeit(
+            lambda: template._expand_nodes(template._compile(tpl), VARIABLES),
+            number=number)
+        cached = timeit.timeit(
+            lambda: template.expand(tpl, VARIABLES), number=number)
+        compiled = timeit.timeit(
+            lambda: template._expand_nodes(nodes, VARIABLES), number=number)
+        print("%-60s %12.4f %12.4f %12.4f" % (
+            tpl, uncompiled, cached, compiled))
+    print(template.cache.info())
+
+
+def run_batch(rows=100000):
+    tpl = template.Template(TEMPLATES[1])
+    variables = [dict(VARIABLES, name='label%d' % i) for i in range(rows)]
+    looped = timeit.timeit(
+        lambda: [template._expand_nodes(tpl._nodes, v) for v in variables],
+        number=1)
+    batched = timeit.timeit(
+        lambda: list(tpl.expand_many(variables, as_string=True)), number=1)
+    print("\nexpand_many over %d rows: loop %.4fs, batch %.4fs" % (
+        rows, looped, batched))
+
+
+def run_url(number=20000):
+    print()
+    for tpl in TEMPLATES[1:]:
+        compiled = template.Template(tpl)
+        reparsed = timeit.timeit(
+            lambda: compiled.expand(VARIABLES, reparse=True), number=number)
+        direct = timeit.timeit(
+            lambda: compiled.expand(VARIABLES, reparse=False), number=number)
+        print("%-60s reparse %.4fs, direct %.4fs" % (tpl, reparsed, direct))
+
+
+if __name__ == '__main__':
+    run()
+    run_batch()
+    run_url()
@@ -0,0 +1,63 @@
+"""
+Benchmark repeatedly serialising and hashing URL instances, and measure the
+memory used per instance.
+
+Run with::
+
+    $ python benchmarks/bench_url.py
+"""
+from __future__ import print_function
+
+import time
+import tracemalloc
+
+from purl import URL
+
+
+def build_urls(number):
+    return [URL('http://user@example.com:8080/path/%d/item?page=%d&q=term#top'
+                % (i, i % 10)) for i in range(number)]
+
+
+def measure_memory(factory, number):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = factory(number)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return objects, float(after - before) / number
+
+
+def run(number=20000, repeat=10):
+    urls = build_urls(number)
+
+    start = time.time()
+    for _ in range(repeat):
+        for u in urls:
+            u._build_string()
+            hash(u._tuple)
+    uncached = time.time() - start
+
+    start = time.time()
+    for _ in range(repeat):
+        for u in urls:
+            u.as_string()
+            hash(u)
+    cached = time.time() - start
+    print("Serialising and hashing %d URLs %d times: rebuilt %.3fs, "
+          "cached %.3fs" % (number, repeat, uncached, cached))
+
+    urls, fresh = measure_memory(build_urls, number)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for u in urls:
+        u.as_string()
+        hash(u)
+    filled = float(tracemalloc.get_traced_memory()[0] - before) / number
+    tracemalloc.stop()
+    print("Memory per instance: %.0f bytes, plus %.0f bytes once the string "
+          "and hash are cached" % (fresh, filled))
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,67 @@
+"""
+Benchmark filtering a file of URLs on host, comparing views over a memory
+mapped file with parsing each line.
+
+Run with::
+
+    $ python benchmarks/bench_view.py
+"""
+from __future__ import print_function
+
+import mmap
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from purl import iter_views, parse_iter
+
+
+def write_file(path, number):
+    rng = random.Random(0)
+    with open(path, 'w') as f:
+        for i in range(number):
+            f.write('https://www.example%d.com/category/%d/item-%d?page=%d\n'
+                    % (rng.randrange(100), rng.randrange(100), i,
+                       rng.randrange(20)))
+
+
+def filter_lines(path, host):
+    with open(path) as f:
+        return [u.path() for u in parse_iter(f) if u.host() == host]
+
+
+def filter_views(path, host):
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        paths = [v.path() for v in iter_views(buffer, host=host.encode())]
+        buffer.close()
+    return paths
+
+
+def run(number=200000):
+    handle, path = tempfile.mkstemp()
+    os.close(handle)
+    try:
+        write_file(path, number)
+        host = 'www.example7.com'
+        print("Filtering %d URLs on host:" % number)
+        for name, function in (('parse_iter', filter_lines),
+                               ('iter_views', filter_views)):
+            start = time.time()
+            paths = function(path, host)
+            elapsed = time.time() - start
+
+            tracemalloc.start()
+            function(path, host)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print("  %-10s %.3fs, peak %.0fKB traced, %d matches" % (
+                name, elapsed, peak / 1024.0, len(paths)))
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    run()
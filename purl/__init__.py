@@ -1,6 +1,12 @@
-from .url import URL  # noqa
+from .url import URL, CompactURL  # noqa
 from .template import expand, Template  # noqa
+from .router import Router  # noqa
+from .query import QueryFilter  # noqa
+from .batch import URLBatch, parse_many, parse_iter, ParseError  # noqa
+from .view import URLView, iter_views  # noqa
 
 __version__ = '1.6'
 
-__all__ = ['URL', 'expand', 'Template']
+__all__ = ['URL', 'CompactURL', 'expand', 'Template', 'Router', 'QueryFilter',
+           'URLBatch', 'parse_many', 'parse_iter', 'ParseError',
+           'URLView', 'iter_views']
@@ -0,0 +1,252 @@
+from itertools import islice
+import os
+
+from . import url
+
+
+__all__ = ['URLBatch', 'parse_many', 'parse_iter', 'ParseError']
+
+
+class ParseError(ValueError):
+    """
+    Raised, or yielded, by :func:`parse_iter` for a line which isn't a valid
+    URL.  The line and its (1-based) number are available as ``line`` and
+    ``lineno``.
+    """
+
+    def __init__(self, message, line, lineno):
+        super(ParseError, self).__init__(message)
+        self.line = line
+        self.lineno = lineno
+
+
+def parse_iter(lines, errors='raise', compact=False):
+    """
+    Lazily parse each line of a file or other iterable of URL strings
+
+    Surrounding whitespace (including the newline) is stripped and blank
+    lines are skipped.  Lines are parsed as they are read so memory use
+    doesn't grow with the size of the input.
+
+    :param lines: a file object (opened in text or binary mode) or any
+        iterable of strings
+    :param string errors: what to do with a line which can't be parsed:
+        ``'raise'`` a :class:`ParseError`, ``'skip'`` it, or ``'yield'`` the
+        :class:`ParseError` in place of the URL and carry on
+    :param boolean compact: yield :class:`~purl.CompactURL` instances
+    """
+    if errors not in ('raise', 'skip', 'yield'):
+        raise ValueError("Unknown errors option: %r" % errors)
+    return _parse_lines(lines, errors, compact)
+
+
+def _parse_lines(lines, errors, compact):
+    from_tuple = (url.CompactURL if compact else url.URL)._from_tuple
+    parse = url._parse_encoded
+    to_unicode = url.to_unicode
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            parsed = from_tuple(parse(to_unicode(line)))
+        except ValueError as e:
+            if errors == 'skip':
+                continue
+            error = ParseError("Line %d: %s" % (lineno, e), line, lineno)
+            if errors == 'raise':
+                raise error
+            yield error
+        else:
+            yield parsed
+
+
+def parse_many(strings, workers=None, chunksize=10000):
+    """
+    Parse many URL strings into a :class:`URLBatch`, spreading the work
+    across a pool of processes
+
+    Each worker parses a chunk of strings into columns and sends those back
+    rather than pickled :class:`~purl.URL` objects.
+
+    :param strings: an iterable of URL strings
+    :param int workers: the number of processes to use, defaulting to the
+        number of CPUs.  With 1 the strings are parsed in this process.
+    :param int chunksize: the number of strings sent to a worker at a time
+    """
+    if workers is None:
+        # cpu_count() is missing on Python 2 and may return None
+        workers = (os.cpu_count() if hasattr(os, 'cpu_count') else None) or 1
+    if workers <= 1:
+        return URLBatch(strings)
+    from concurrent.futures import ProcessPoolExecutor
+
+    batch = URLBatch()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for columns in executor.map(_parse_chunk, _chunks(strings, chunksize)):
+            batch._extend_columns(columns)
+    return batch
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parse_chunk(strings):
+    return URLBatch(strings)._columns
+
+
+class URLBatch(object):
+    """
+    A column-oriented collection of parsed URLs.
+
+    Each component is held in its own list (one per field of a URL) rather
+    than in a :class:`~purl.URL` object per row, and hosts and schemes are
+    interned so repeated values are only stored once.  Accessors return a
+    whole column at a time, and individual :class:`~purl.URL` instances are
+    only created when indexed or iterated.  Slicing returns a new batch.
+
+    Example::
+
+        >>> batch = URLBatch(['http://a.com/x?page=1', 'https://b.com/y/z'])
+        >>> batch.hosts()
+        ['a.com', 'b.com']
+        >>> batch.path_segment(1)
+        [None, 'z']
+        >>> batch.query_param('page')
+        ['1', None]
+        >>> batch[1].as_string()
+        'https://b.com/y/z'
+    """
+
+    def __init__(self, strings=()):
+        # One list per _URLTuple field, in the same order
+        self._columns = tuple([] for _ in url._URLTuple._fields)
+        self._interned = {}
+        self.extend(strings)
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            batch = URLBatch()
+            batch._columns = tuple(column[index] for column in self._columns)
+            # The sliced columns only hold strings already in this table
+            batch._interned = dict(self._interned)
+            return batch
+        return url.URL._from_tuple(
+            url._URLTuple._make(column[index] for column in self._columns))
+
+    def __iter__(self):
+        from_tuple = url.URL._from_tuple
+        for row in zip(*self._columns):
+            yield from_tuple(url._URLTuple._make(row))
+
+    def extend(self, strings):
+        """
+        Parse and add the passed URL strings
+        """
+        (hosts, usernames, passwords, schemes, ports, paths, queries,
+         fragments) = self._columns
+        intern = self._interned.setdefault
+        parse = url._parse_encoded
+        to_unicode = url.to_unicode
+        for url_str in strings:
+            parts = parse(to_unicode(url_str))
+            hosts.append(intern(parts.host, parts.host))
+            usernames.append(parts.username)
+            passwords.append(parts.password)
+            schemes.append(intern(parts.scheme, parts.scheme))
+            ports.append(parts.port)
+            paths.append(parts.path)
+            queries.append(parts.query)
+            fragments.append(parts.fragment)
+
+    def _extend_columns(self, columns):
+        """
+        Add the rows of another batch's columns
+        """
+        intern = self._interned.setdefault
+        for index, column in enumerate(columns):
+            if index in (0, 3):
+                # Hosts and schemes
+                column = [intern(value, value) for value in column]
+            self._columns[index].extend(column)
+
+    def column(self, name):
+        """
+        Return a list of the passed component (eg ``'host'``) for each URL
+
+        :param string name: one of host, username, password, scheme, port,
+            path, query or fragment
+        """
+        try:
+            index = url._URLTuple._fields.index(name)
+        except ValueError:
+            raise ValueError("Unknown URL component: %r" % name)
+        return list(self._columns[index])
+
+    def hosts(self):
+        """
+        Return a list of the host of each URL
+        """
+        return self.column('host')
+
+    def schemes(self):
+        """
+        Return a list of the scheme of each URL
+        """
+        return self.column('scheme')
+
+    def paths(self):
+        """
+        Return a list of the path of each URL
+        """
+        return self.column('path')
+
+    def path_segment(self, index, default=None):
+        """
+        Return a list of the (decoded) path segment at the passed index of
+        each URL, or ``default`` where there isn't one
+        """
+        unquote = url.unicode_unquote
+        segments = []
+        for path in self._columns[5]:
+            parts = path.split('/')
+            del parts[0]
+            if path.endswith('/'):
+                parts.pop()
+            try:
+                segments.append(unquote(parts[index]))
+            except IndexError:
+                segments.append(default)
+        return segments
+
+    def query_param(self, key, default=None, as_list=False):
+        """
+        Return a list of the value of the passed query parameter for each
+        URL, or ``default`` where it isn't present
+
+        As with :meth:`URL.query_param`, a list is given for URLs where the
+        parameter has several values, or for all URLs with ``as_list=True``.
+        Only the matching parameters are decoded.
+        """
+        decode = url._decode_query_component
+        iter_query = url._iter_query
+        results = []
+        for query in self._columns[6]:
+            values = [decode(value) for raw_key, value in iter_query(query)
+                      if decode(raw_key) == key]
+            if not values:
+                results.append(default)
+            elif as_list or len(values) > 1:
+                results.append(values)
+            else:
+                results.append(values[0])
+        return results
@@ -0,0 +1,78 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+
+__all__ = ['LRUCache', 'CacheInfo']
+
+
+CacheInfo = namedtuple("CacheInfo", "hits misses maxsize currsize")
+
+
+class LRUCache(object):
+    """
+    A bounded, thread-safe cache which evicts the least recently used entry
+    once ``maxsize`` entries are stored.
+
+    Setting ``maxsize`` to 0 disables the cache: nothing is stored and every
+    lookup calls straight through to the loader.
+    """
+
+    def __init__(self, maxsize=128):
+        self._maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, loader):
+        """
+        Return the cached value for ``key``, calling ``loader(key)`` to build
+        and store it if it isn't present.
+        """
+        if not self._maxsize:
+            return loader(key)
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._data[key] = value
+                return value
+
+        # Build the value outside the lock so slow loaders don't serialise
+        # every other thread.
+        value = loader(key)
+        with self._lock:
+            self._data[key] = value
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def resize(self, maxsize):
+        """
+        Change the maximum number of entries, evicting any excess
+        """
+        with self._lock:
+            self._maxsize = maxsize
+            while len(self._data) > maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all entries and reset the hit and miss counters
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        """
+        Return a :class:`CacheInfo` tuple of hits, misses, maxsize and
+        current size
+        """
+        return CacheInfo(self.hits, self.misses, self._maxsize, len(self._data))
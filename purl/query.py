@@ -0,0 +1,96 @@
+import re
+
+from . import url
+
+
+__all__ = ['QueryFilter']
+
+
+class QueryFilter(object):
+    """
+    A compiled set of rules for removing query parameters from URLs, such as
+    tracking parameters.
+
+    Parameters are removed if their (decoded) key is one of ``names``,
+    starts with one of ``prefixes`` or matches one of the regular expression
+    ``patterns`` from its start.  The rules are compiled once, and each URL
+    is cleaned in a single pass over its raw query string, leaving the
+    encoding and order of the other parameters untouched.
+
+    Example::
+
+        >>> tracking = QueryFilter(names=['fbclid', 'gclid'], prefixes=['utm_'])
+        >>> tracking.apply('http://example.com/?id=1&utm_source=x&fbclid=y').as_string()
+        'http://example.com/?id=1'
+    """
+
+    def __init__(self, names=(), prefixes=(), patterns=()):
+        self._names = frozenset(names)
+        self._prefixes = tuple(prefixes)
+        # Compiled patterns are kept as they are so their flags apply
+        self._patterns = tuple(re.compile(p) for p in patterns)
+
+    def matches(self, key):
+        """
+        Return True if the passed (decoded) query key should be removed
+        """
+        if key in self._names:
+            return True
+        if self._prefixes and key.startswith(self._prefixes):
+            return True
+        for pattern in self._patterns:
+            if pattern.match(key) is not None:
+                return True
+        return False
+
+    def apply(self, url_or_string):
+        """
+        Return the passed URL with the matching query parameters removed
+
+        :param url_or_string: a :class:`~purl.URL` or string
+        :returns: a :class:`~purl.URL`, which is the passed one if nothing was
+            removed
+        """
+        if not isinstance(url_or_string, url.URL):
+            url_or_string = url.to_unicode(url_or_string)
+            if '?' not in url_or_string:
+                # Nothing to remove, so don't even parse it
+                return url.URL(url_or_string, lazy=True)
+            url_or_string = url.URL(url_or_string)
+        parts = url_or_string._tuple
+        query = self.apply_query(parts.query)
+        if query is parts.query:
+            return url_or_string
+        return url.URL._from_tuple(
+            url._with_absolute_path(parts._replace(query=query)))
+
+    def apply_many(self, urls):
+        """
+        Lazily yield each of the passed URLs with the matching query
+        parameters removed
+
+        :param urls: an iterable of :class:`~purl.URL` instances or strings
+        """
+        apply = self.apply
+        for u in urls:
+            yield apply(u)
+
+    def apply_query(self, query):
+        """
+        Return the passed raw query string with the matching parameters
+        removed, or the same string if none match
+        """
+        if not query:
+            return query
+        kept = []
+        removed = False
+        decode = url._decode_query_component
+        matches = self.matches
+        for chunk in query.split('&'):
+            if not chunk:
+                continue
+            if matches(decode(chunk.partition('=')[0])):
+                removed = True
+            else:
+                kept.append(chunk)
+        return '&'.join(kept) if removed else query
@@ -0,0 +1,232 @@
+from . import url
+from .template import Template, _Expression, _escape_all, _split_head
+
+
+__all__ = ['Router']
+
+
+# Trie tokens for path segments which aren't literal text
+_ANY = object()       # a whole segment filled by a simple expression: {id}
+_OPTIONAL = object()  # a segment which may be absent: {/id}
+
+
+class _Node(object):
+    __slots__ = ('children', 'wildcard', 'routes', 'partial_routes')
+
+    def __init__(self):
+        self.children = {}
+        self.wildcard = None
+        # Routes whose path ends at this node
+        self.routes = []
+        # Routes whose path continues in a way the trie can't represent, so
+        # which need checking against any URL reaching this node
+        self.partial_routes = []
+
+
+class Router(object):
+    """
+    An index of URL templates which can resolve a URL to the template that
+    matches it.
+
+    Templates are stored in a trie keyed on their literal path segments, so
+    resolving a URL only needs to check the few templates whose path prefix
+    matches, no matter how many are registered.  Templates without a
+    scheme and host are matched against the path, query and fragment of
+    any URL.
+
+    Example::
+
+        >>> router = Router()
+        >>> router.add('/users{/id}', 'user-detail')
+        >>> router.add('/users/{id}/posts{?page}', 'user-posts')
+        >>> router.resolve('/users/42/posts?page=2')
+        ('user-posts', {'id': '42', 'page': '2'})
+        >>> router.resolve('/groups/1')
+    """
+
+    def __init__(self):
+        self._roots = {}
+        self._unindexed = []
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def add(self, template, target=None):
+        """
+        Register a template
+
+        :param template: a :class:`~purl.Template` or template string
+        :param target: the object to return when the template matches,
+            defaults to the template itself
+        """
+        if not isinstance(template, Template):
+            template = Template(template)
+        route = (template, template if target is None else target)
+        self._count += 1
+
+        split = _split_head(template._nodes)
+        if split is None:
+            # The authority is variable so the template has to be tried
+            # against every URL
+            self._unindexed.append(route)
+            return
+        head, nodes = split
+        root = self._roots.setdefault(head, _Node())
+        tokens, complete = _tokenise(nodes)
+        _insert(root, tokens, route, complete)
+
+    def resolve(self, url_or_string):
+        """
+        Find the template which matches the passed URL
+
+        Templates with more specific (literal) paths are preferred, followed
+        by the order in which they were added.
+
+        :param url_or_string: a :class:`~purl.URL` or string to resolve
+        :returns: a (target, variables) tuple, or None if nothing matches
+        """
+        if not isinstance(url_or_string, url.URL):
+            url_or_string = url.URL(url_or_string)
+        parts = url_or_string._tuple
+        segments = parts.path.split('/')[1:]
+
+        relative = parts.path
+        if parts.query:
+            relative += '?' + parts.query
+        if parts.fragment:
+            relative += '#' + parts.fragment
+        absolute = url_or_string.as_string()
+
+        candidates = []
+        if parts.host:
+            head = '%s://%s' % (parts.scheme, url_or_string.netloc())
+            if head in self._roots:
+                candidates.append((self._roots[head], absolute))
+        if '' in self._roots:
+            candidates.append((self._roots[''], relative))
+
+        for root, string in candidates:
+            for template, target in _walk(root, segments, 0):
+                variables = template.match(string)
+                if variables is not None:
+                    return target, variables
+        for template, target in self._unindexed:
+            variables = template.match(absolute)
+            if variables is not None:
+                return target, variables
+        return None
+
+
+def _tokenise(nodes):
+    """
+    Convert the path part of the compiled nodes into a list of trie tokens
+
+    Returns a (tokens, complete) tuple where complete is False if the path
+    contained something the trie can't represent, in which case the tokens
+    only cover the path up to that point.
+    """
+    tokens = []
+    current = None  # Pieces of the current segment
+    for node in nodes:
+        if node.__class__ is _Expression:
+            prefix_char = node.operator[0]
+            if prefix_char in ('?', '&', '#'):
+                return tokens, _close(tokens, current)
+            single = (len(node.variables) == 1 and
+                      not node.variables[0][2] and
+                      node.variables[0][3] is None)
+            if prefix_char == '/':
+                # Always starts a new segment, so the pending one can still
+                # be indexed even if this expression can't
+                if not _close(tokens, current) or not single:
+                    return tokens, False
+                tokens.append(_OPTIONAL)
+                current = [_OPTIONAL]
+            elif (prefix_char == '' and single and current is not None and
+                  node.operator[3] is _escape_all):
+                # Reserved ({+var}) expansions can span several segments so
+                # only simple ones are indexed as a single segment
+                current.append(node)
+            else:
+                return tokens, False
+            continue
+
+        end = min(i for i in (node.find('?'), node.find('#'), len(node))
+                  if i >= 0)
+        pieces = node[:end].split('/')
+        if pieces[0]:
+            if current is None:
+                return tokens, False
+            current.append(pieces[0])
+        for piece in pieces[1:]:
+            if not _close(tokens, current):
+                return tokens, False
+            current = [piece] if piece else []
+        if end < len(node):
+            return tokens, _close(tokens, current)
+    return tokens, _close(tokens, current)
+
+
+def _close(tokens, pieces):
+    """
+    Append the token for a finished segment, returning False if the segment
+    can't be represented
+    """
+    if pieces is None:
+        return True
+    if not pieces:
+        tokens.append('')
+    elif pieces[0] is _OPTIONAL:
+        # Already added - but nothing can follow it within the segment
+        return len(pieces) == 1
+    elif all(piece.__class__ is not _Expression for piece in pieces):
+        tokens.append(''.join(pieces))
+    elif len(pieces) == 1:
+        tokens.append(_ANY)
+    else:
+        return False
+    return True
+
+
+def _insert(node, tokens, route, complete, index=0):
+    if index == len(tokens):
+        if complete:
+            node.routes.append(route)
+        else:
+            node.partial_routes.append(route)
+        return
+    token = tokens[index]
+    if token is _OPTIONAL:
+        # Index both with and without the segment
+        _insert(node, tokens, route, complete, index + 1)
+        token = _ANY
+    if token is _ANY:
+        if node.wildcard is None:
+            node.wildcard = _Node()
+        child = node.wildcard
+    else:
+        child = node.children.get(token)
+        if child is None:
+            child = node.children[token] = _Node()
+    _insert(child, tokens, route, complete, index + 1)
+
+
+def _walk(node, segments, index):
+    """
+    Yield the routes which could match the passed path segments, most
+    specific first
+    """
+    if index == len(segments):
+        for route in node.routes:
+            yield route
+    else:
+        child = node.children.get(segments[index])
+        if child is not None:
+            for route in _walk(child, segments, index + 1):
+                yield route
+        if node.wildcard is not None:
+            for route in _walk(node.wildcard, segments, index + 1):
+                yield route
+    for route in node.partial_routes:
+        yield route
@@ -1,13 +1,9 @@
 import re
 import functools
-
-try:
-    from urllib.parse import quote
-except ImportError:
-    # Python 2
-    from urllib import quote
+from collections import namedtuple
 
 from . import url
+from .cache import LRUCache
 
 
 __all__ = ['Template', 'expand']
@@ -16,25 +12,348 @@ __all__ = ['Template', 'expand']
 patterns = re.compile(r"{([^\}]+)}")
 
 
+# A compiled template is a tuple of nodes, each of which is either a literal
+# string or an _Expression.  The expression holds the operator tuple from
+# ``operator_map`` alongside a (key, modifier_fn, explode, rendered) tuple for
+# each variable so that nothing needs re-parsing at expansion time.  The
+# rendered element is None unless the variable has been fixed by
+# ``Template.partial``, in which case it holds the escaped, formatted value.
+_Expression = namedtuple("_Expression", "operator variables")
+
+# Compiled templates keyed on the template string.  This lets the functional
+# ``expand`` API skip re-parsing templates it has already seen.  Use
+# ``cache.resize(n)`` to change its size (0 disables it), ``cache.clear()`` to
+# empty it and ``cache.info()`` to read the hit and miss counters.
+cache = LRUCache(maxsize=256)
+
+# Matches a leading scheme and authority marker, eg 'http://' or '//'
+_authority_start = re.compile(r"^(?:[A-Za-z][A-Za-z0-9+.-]*:)?//")
+
+# Delimiters which move expansion from the path to the query or fragment
+_delimiters = re.compile(r"([?#])")
+
+# Matches the first character after the authority
+_component_start = re.compile(r"[/?#]")
+
+_PATH, _QUERY, _FRAGMENT = 0, 1, 2
+
+
 class Template(object):
+    """
+    A URL template as per RFC 6570.
+
+    The template string is compiled once on construction so repeated calls to
+    :meth:`expand` only need to walk the compiled nodes.
+    """
 
     def __init__(self, url_str):
         self._base = url_str
+        self._nodes = cache.get(url_str, _compile)
+        self._components = _compile_components(self._nodes)
+        self._matcher = None
 
     def __str__(self):
         return 'Template: %s' % self._base
 
-    def expand(self, variables=None):
-        return url.URL(expand(self._base, variables))
+    @classmethod
+    def _from_nodes(cls, base, nodes):
+        template = cls.__new__(cls)
+        template._base = base
+        template._nodes = nodes
+        template._components = _compile_components(nodes)
+        template._matcher = None
+        return template
+
+    def partial(self, **fixed_vars):
+        """
+        Return a new template with some variables fixed
+
+        The fixed variables are escaped and formatted once, and folded into
+        the literal text of the template where possible, so later expansions
+        only do work for the variables that are still free.  Passing a fixed
+        variable to :meth:`expand` has no effect.
+
+        Example::
+
+            >>> tpl = Template('{scheme}://{host}/api{/version,resource}')
+            >>> tpl.partial(scheme='https', host='example.com', version='v2').expand(
+            ...     {'resource': 'users'}).as_string()
+            'https://example.com/api/v2/users'
+
+        :returns: new :class:`Template` instance
+        """
+        return Template._from_nodes(
+            self._base, _specialise(self._nodes, fixed_vars))
+
+    def match(self, url_or_string):
+        """
+        Extract the variables from a URL which matches this template
+
+        This is the reverse of :meth:`expand`.  The template is compiled into
+        a regex the first time it is used.  Lists are returned for exploded
+        variables and for values which were joined with commas.
+
+        Example::
+
+            >>> tpl = Template('/repos{/owner,repo}{?page}')
+            >>> variables = tpl.match('/repos/codeinthehole/purl?page=2')
+            >>> variables['repo'], variables['page']
+            ('purl', '2')
+            >>> tpl.match('/users/codeinthehole')
+
+        :param url_or_string: a :class:`~purl.URL` or string to match
+        :returns: a dict of variables, or None if the URL doesn't match
+        """
+        if self._matcher is None:
+            self._matcher = _compile_matcher(self._nodes)
+        if isinstance(url_or_string, url.URL):
+            url_or_string = url_or_string.as_string()
+        return _match_nodes(self._matcher, url_or_string)
+
+    def expand(self, variables=None, reparse=None):
+        """
+        Expand the template using the passed variables
+
+        When ``reparse`` is False, the expansion is written straight into the
+        path, query and fragment components rather than being built into a
+        string and parsed again.  This requires the scheme and authority to
+        be literal text in the template; otherwise the expanded string is
+        parsed as normal.  By default, the string is only parsed again when
+        they aren't.  The fragment is then kept as expanded, whereas parsing
+        the string escapes it a second time.
+
+        :param dict variables: the variables to substitute into the template
+        :param boolean reparse: whether to parse the expanded string
+        :returns: new :class:`~purl.URL` instance
+        """
+        if not reparse and self._components is not None:
+            return _expand_components(self._components, variables)
+        return url.URL(_expand_nodes(self._nodes, variables))
+
+    def expand_many(self, iterable, as_string=False, reparse=None):
+        """
+        Lazily expand the template against each dict of variables in the
+        passed iterable.
+
+        Results are yielded one at a time so arbitrarily large inputs can be
+        streamed.
+
+        :param iterable: an iterable of variable dicts
+        :param boolean as_string: yield strings rather than :class:`~purl.URL`
+            instances
+        :param boolean reparse: whether to parse each expanded string (see
+            :meth:`expand`)
+        """
+        if not (as_string or reparse) and self._components is not None:
+            components = self._components
+            for variables in iterable:
+                yield _expand_components(components, variables)
+            return
+        nodes = self._nodes
+        for variables in iterable:
+            expanded = _expand_nodes(nodes, variables)
+            yield expanded if as_string else url.URL(expanded)
 
 
 def expand(template, variables=None):
     """
     Expand a URL template string using the passed variables
     """
+    return _expand_nodes(cache.get(template, _compile), variables)
+
+
+def _compile(template):
+    """
+    Compile a template string into a tuple of literal strings and
+    _Expression nodes
+    """
+    nodes = []
+    position = 0
+    for match in patterns.finditer(template):
+        if match.start() > position:
+            nodes.append(template[position:match.start()])
+        expression = match.group(1)
+        operator = operator_map.get(expression[0], defaults)
+        split_fn = operator[2]
+        variables = tuple(spec + (None,) for spec in split_fn(expression))
+        nodes.append(_Expression(operator, variables))
+        position = match.end()
+    if position < len(template):
+        nodes.append(template[position:])
+    return tuple(nodes)
+
+
+def _expand_nodes(nodes, variables=None):
+    """
+    Expand a compiled template using the passed variables
+    """
     if variables is None:
         variables = {}
-    return patterns.sub(functools.partial(_replace, variables), template)
+    parts = []
+    for node in nodes:
+        if node.__class__ is _Expression:
+            parts.append(_expand_expression(node, variables))
+        else:
+            parts.append(node)
+    return ''.join(parts)
+
+
+def _specialise(nodes, fixed_vars):
+    """
+    Return a copy of the compiled nodes with the passed variables rendered
+    and, where possible, folded into the neighbouring literals
+    """
+    specialised = []
+    for node in nodes:
+        if node.__class__ is _Expression:
+            specialised.extend(_specialise_expression(node, fixed_vars))
+        else:
+            specialised.append(node)
+
+    # Merge adjacent literals
+    merged = []
+    for node in specialised:
+        if (node.__class__ is not _Expression and merged and
+                merged[-1].__class__ is not _Expression):
+            merged[-1] += node
+        elif node != '':
+            merged.append(node)
+    return tuple(merged)
+
+
+def _specialise_expression(expression, fixed_vars):
+    """
+    Return a list of nodes equivalent to the passed expression with the fixed
+    variables rendered
+    """
+    (prefix_char, separator_char, split_fn, escape_fn,
+     format_fn) = expression.operator
+    variables = []
+    for key, modify_fn, explode, rendered in expression.variables:
+        if rendered is None and key in fixed_vars:
+            rendered = format_fn(explode, separator_char, escape_fn, key,
+                                 modify_fn(fixed_vars[key]))
+        variables.append((key, modify_fn, explode, rendered))
+
+    # Leading rendered variables are always output so they can be folded
+    # into a literal.  Any remaining variables form an expression which is
+    # prefixed with the separator instead, just like the RFC's '&' operator
+    # continues a '?' expression.
+    leading = []
+    while variables and variables[0][3] is not None:
+        leading.append(variables.pop(0)[3])
+    if not leading:
+        return [_Expression(expression.operator, tuple(variables))]
+    nodes = [prefix_char + separator_char.join(leading)]
+    if variables:
+        operator = (separator_char, separator_char, split_fn, escape_fn,
+                    format_fn)
+        nodes.append(_Expression(operator, tuple(variables)))
+    return nodes
+
+
+def _split_head(nodes):
+    """
+    Split compiled nodes into the literal scheme and authority string, and
+    the nodes which make up the path, query and fragment.
+
+    Returns None when the authority depends on a variable, as then only a
+    full parse can tell where each part ends.
+    """
+    nodes = list(nodes)
+    literal = ''
+    if nodes and nodes[0].__class__ is not _Expression:
+        literal = nodes.pop(0)
+    next_prefix = nodes[0].operator[0] if nodes else None
+
+    if _authority_start.match(literal):
+        start = _authority_start.match(literal).end()
+        match = _component_start.search(literal, start)
+        if match is not None:
+            head, literal = literal[:match.start()], literal[match.start():]
+        elif not nodes or next_prefix in ('/', '?', '#'):
+            head, literal = literal, ''
+        else:
+            return None
+    elif literal[:1] in ('/', '?', '#') or (
+            not literal and next_prefix in (None, '/', '?', '#')):
+        head = ''
+    else:
+        return None
+    if literal:
+        nodes.insert(0, literal)
+    return head, tuple(nodes)
+
+
+def _compile_components(nodes):
+    """
+    Compile nodes for expanding straight into URL components.
+
+    Returns a (head, tail) tuple where head is a dict of the encoded scheme,
+    username, password, host and port, and tail is a tuple of expressions and
+    pre-split literals.  Returns None if the authority isn't literal.
+    """
+    split = _split_head(nodes)
+    if split is None:
+        return None
+    head, nodes = split
+    try:
+        params = url.parse(head)
+    except ValueError:
+        # Eg an invalid port - leave it for the full parse to report
+        return None
+    head = {'host': params['host'],
+            'username': url.unicode_quote(params['username']),
+            'password': url.unicode_quote(params['password']),
+            'scheme': params['scheme'],
+            'port': params['port']}
+    tail = tuple(node if node.__class__ is _Expression
+                 else _split_delimiters(node) for node in nodes)
+    return head, tail
+
+
+def _split_delimiters(string):
+    """
+    Split a string into a tuple of (delimiter, text) pairs where delimiter is
+    the '?' or '#' preceding the text (or '' for leading text)
+    """
+    if '?' not in string and '#' not in string:
+        return (('', string),)
+    parts = _delimiters.split(string)
+    pieces = [('', parts[0])] if parts[0] else []
+    for index in range(1, len(parts), 2):
+        pieces.append((parts[index], parts[index + 1]))
+    return tuple(pieces)
+
+
+def _expand_components(components, variables=None):
+    """
+    Expand a template straight into a :class:`~purl.URL` by routing each
+    expanded chunk to the path, query or fragment without re-parsing.
+    """
+    if variables is None:
+        variables = {}
+    head, tail = components
+    parts = ([], [], [])
+    state = _PATH
+    for node in tail:
+        if node.__class__ is _Expression:
+            expanded = _expand_expression(node, variables)
+            if not expanded:
+                continue
+            node = _split_delimiters(expanded)
+        for delimiter, text in node:
+            if delimiter == '?' and state == _PATH:
+                state = _QUERY
+            elif delimiter == '#' and state != _FRAGMENT:
+                state = _FRAGMENT
+            elif delimiter:
+                parts[state].append(delimiter)
+            parts[state].append(text)
+    return url.URL._from_tuple(url._URLTuple(
+        head['host'], head['username'], head['password'], head['scheme'],
+        head['port'], ''.join(parts[_PATH]), ''.join(parts[_QUERY]),
+        ''.join(parts[_FRAGMENT])))
 
 
 # Utils
@@ -169,12 +488,16 @@ def _split_operator(string):
 # ------------------
 
 
+_quote_all = url._get_quoter("")
+_quote_reserved = url._get_quoter("/!,.;")
+
+
 def _escape_all(value):
-    return url.unicode_quote(value, safe="")
+    return _quote_all(value)
 
 
 def _escape_reserved(value):
-    return url.unicode_quote(value, safe="/!,.;")
+    return _quote_reserved(value)
 
 # Operator map
 # ------------
@@ -192,19 +515,18 @@ operator_map = {
 defaults = ('', ',', _split_basic, _escape_all, _format_default)
 
 
-def _replace(variables, match):
+def _expand_expression(expression, variables):
     """
-    Return the appropriate replacement for `match` using the passed variables
+    Return the expansion of a compiled expression using the passed variables
     """
-    expression = match.group(1)
-
-    # Look-up chars and functions for the specified operator
     (prefix_char, separator_char, split_fn, escape_fn,
-     format_fn) = operator_map.get(expression[0], defaults)
+     format_fn) = expression.operator
 
     replacements = []
-    for key, modify_fn, explode in split_fn(expression):
-        if key in variables:
+    for key, modify_fn, explode, rendered in expression.variables:
+        if rendered is not None:
+            replacements.append(rendered)
+        elif key in variables:
             variable = modify_fn(variables[key])
             replacement = format_fn(
                 explode, separator_char, escape_fn, key, variable)
@@ -212,3 +534,182 @@ def _replace(variables, match):
     if not replacements:
         return ''
     return prefix_char + separator_char.join(replacements)
+
+
+# Matching
+# --------
+# Templates are matched against URLs by compiling the nodes into a single
+# regex with one group per expression.  The captured text for each expression
+# is then split back into its variables.
+
+# Characters, other than letters, digits and '-', which _escape_all and
+# _escape_reserved leave unescaped
+_unreserved_chars = "_.~%"
+_reserved_chars = _unreserved_chars + "/!,;"
+
+# Characters, other than letters, digits and '-', which may appear unescaped
+# in a path segment (RFC 3986 pchar) and in a query or fragment.  Matched
+# values can contain any of them, as URLs aren't always escaped the same way
+# as expansions.
+_pchars = _unreserved_chars + "!$&'()*+,;=:@"
+_query_chars = _pchars + "/?"
+
+_named_formats = (_format_pair_no_equals, _format_pair_with_equals)
+
+
+def _compile_matcher(nodes):
+    """
+    Compile a regex which matches the strings the passed nodes can expand to
+    """
+    parts = []
+    expressions = []
+    for node in nodes:
+        if node.__class__ is _Expression:
+            parts.append('(%s)' % _expression_pattern(node))
+            expressions.append(node)
+        else:
+            parts.append(re.escape(node))
+    return re.compile('%s\\Z' % ''.join(parts)), tuple(expressions)
+
+
+def _expression_pattern(expression):
+    prefix_char, separator_char, _, escape_fn, format_fn = expression.operator
+    if prefix_char in ('?', '&', '#'):
+        chars = _query_chars
+    elif escape_fn is _escape_reserved:
+        chars = _pchars + '/'
+    else:
+        chars = _pchars
+    # Values may not contain the separator
+    chars = chars.replace(separator_char, '')
+    value = _char_class(chars) + '*'
+    if format_fn in _named_formats:
+        item = '%s+(?:=%s)?' % (_char_class(chars.replace('=', '')), value)
+    else:
+        item = value
+    # Each variable expands to at most one item, unless it is exploded or
+    # its value could contain the (unescaped) separator
+    safe_chars = _reserved_chars if escape_fn is _escape_reserved else \
+        _unreserved_chars
+    repeat = '*'
+    if separator_char not in safe_chars + ',' and not any(
+            spec[2] for spec in expression.variables):
+        if len(expression.variables) == 1:
+            return '(?:%s%s)?' % (re.escape(prefix_char), item)
+        repeat = '{0,%d}' % (len(expression.variables) - 1)
+    return '(?:%s%s(?:%s%s)%s)?' % (
+        re.escape(prefix_char), item, re.escape(separator_char), item, repeat)
+
+
+def _char_class(chars):
+    return '[A-Za-z0-9%s-]' % ''.join('\\' + char for char in chars)
+
+
+def _match_nodes(matcher, string):
+    regex, expressions = matcher
+    match = regex.match(string)
+    if match is None:
+        return None
+    result = {}
+    for expression, text in zip(expressions, match.groups()):
+        if not text:
+            continue
+        (prefix_char, separator_char, _, escape_fn,
+         format_fn) = expression.operator
+        items = text[len(prefix_char):].split(separator_char)
+        # Commas in a value can only come from joining a list if the escape
+        # function would otherwise have escaped them
+        split_lists = escape_fn is _escape_all
+        # Query parameters may have spaces encoded as '+'
+        unquote = url._decode_query_component if separator_char == '&' \
+            else url.unicode_unquote
+        if format_fn in _named_formats:
+            extracted = _extract_named(expression.variables, items, unquote)
+        else:
+            extracted = _extract_positional(
+                expression.variables, items, separator_char, split_lists,
+                unquote)
+        if extracted is None:
+            return None
+        result.update(extracted)
+    return result
+
+
+def _decode(value, split_lists=True, unquote=url.unicode_unquote):
+    """
+    Unescape a matched value, splitting joined lists back into a list
+    """
+    if split_lists and ',' in value:
+        return [unquote(v) for v in value.split(',')]
+    return unquote(value)
+
+
+def _extract_positional(variables, items, separator_char, split_lists,
+                        unquote):
+    if len(variables) == 1 and not variables[0][2]:
+        # A single variable takes the whole expansion
+        items = [separator_char.join(items)]
+    elif separator_char == ',':
+        split_lists = False
+    result = {}
+    position = 0
+    for index, (key, _, explode, rendered) in enumerate(variables):
+        if position >= len(items):
+            break
+        if rendered is not None:
+            if items[position] != rendered:
+                return None
+            position += 1
+        elif explode:
+            end = max(position + 1, len(items) - (len(variables) - index - 1))
+            exploded = items[position:end]
+            pairs = sum('=' in v for v in exploded)
+            if pairs == len(exploded):
+                # The keys and values of an associative variable
+                result[key] = [tuple(unquote(part) for part in v.split('=', 1))
+                               for v in exploded]
+            elif pairs:
+                # Can't tell where the pairs start and end
+                return None
+            else:
+                result[key] = [unquote(v) for v in exploded]
+            position = end
+        else:
+            result[key] = _decode(items[position], split_lists, unquote)
+            position += 1
+    if position < len(items):
+        return None
+    return result
+
+
+def _extract_named(variables, items, unquote):
+    rendered = set(spec[3] for spec in variables if spec[3] is not None)
+    explodes = dict((spec[0], spec[2]) for spec in variables
+                    if spec[3] is None)
+    # Unknown names are taken to be the keys of an exploded associative
+    # variable, eg {?params*} matching '?a=1&b=2'
+    exploded = [key for key, explode in explodes.items() if explode]
+    values = {}
+    pairs = []
+    for item in items:
+        if item in rendered:
+            continue
+        key, _, value = item.partition('=')
+        key = unquote(key)
+        if key in explodes:
+            values.setdefault(key, []).append(value)
+        elif exploded:
+            pairs.append((key, unquote(value)))
+        else:
+            return None
+    result = {}
+    for key, matched in values.items():
+        if explodes[key] or len(matched) > 1:
+            result[key] = [unquote(v) for v in matched]
+        else:
+            result[key] = _decode(matched[0], unquote=unquote)
+    if pairs:
+        if exploded[0] in result:
+            return None
+        result[exploded[0]] = pairs
+    return result
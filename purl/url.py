@@ -1,14 +1,17 @@
 from __future__ import unicode_literals
 
 try:
-    from urllib.parse import parse_qs, urlencode, urlparse, quote, unquote
+    from urllib.parse import urlencode, quote_plus, unquote
 except ImportError:
-    from urllib import urlencode, quote, unquote
-    from urlparse import parse_qs, urlparse
-from collections import namedtuple
+    from urllib import urlencode, quote_plus, unquote
+from collections import namedtuple, OrderedDict
+import re
+import struct
 
 import six
 
+from .cache import LRUCache
+
 
 # To minimise memory consumption, we use a namedtuple to store all instance
 # variables, as well as using the __slots__ attribute.
@@ -23,10 +26,10 @@ def to_unicode(string):
     """
     Ensure a passed string is unicode
     """
-    if isinstance(string, six.binary_type):
-        return string.decode('utf8')
     if isinstance(string, six.text_type):
         return string
+    if isinstance(string, six.binary_type):
+        return string.decode('utf8')
     if six.PY2:
         return unicode(string)
     return str(string)
@@ -57,21 +60,78 @@ def dict_to_unicode(raw_dict):
     return decoded
 
 
+# Characters which are never %-encoded, as with urllib's quote
+_always_safe = ('ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+                'abcdefghijklmnopqrstuvwxyz'
+                '0123456789_.-~')
+
+
+class _Quoter(object):
+    """
+    %-encodes strings in the same way as urllib's quote, for one set of
+    safe characters.
+
+    The escaped form of each byte is looked up in a table built up front,
+    strings which need no escaping are spotted with a single regex match
+    and returned as they are, and recently escaped strings are cached.
+    """
+
+    def __init__(self, safe):
+        safe = frozenset(_always_safe + safe)
+        self._table = [six.unichr(i) if six.unichr(i) in safe else
+                       '%%%02X' % i for i in range(256)]
+        self._match_safe = re.compile(
+            '[%s]*\\Z' % re.escape(''.join(sorted(safe)))).match
+        self._cache = LRUCache(maxsize=256)
+
+    def __call__(self, string):
+        if not isinstance(string, six.text_type):
+            if isinstance(string, six.binary_type):
+                # May not be UTF8 so can't be decoded to check
+                return self._escape(string)
+            string = to_unicode(string)
+        if self._match_safe(string) is not None:
+            return string
+        return self._cache.get(string, self._escape)
+
+    def _escape(self, string):
+        if isinstance(string, six.text_type):
+            string = string.encode('utf8')
+        table = self._table
+        return ''.join([table[byte] for byte in bytearray(string)])
+
+
+# Quoters keyed on their safe characters, created when first used
+_quoters = {}
+
+
+def _get_quoter(safe):
+    try:
+        return _quoters[safe]
+    except KeyError:
+        return _quoters.setdefault(safe, _Quoter(to_unicode(safe)))
+
+
 def unicode_quote(string, safe='/'):
     if string is None:
         return None
-    return quote(to_utf8(string), to_utf8(safe))
+    return _get_quoter(safe)(string)
+
+
+_quote_segment = _get_quoter('')
 
 
 def unicode_quote_path_segment(string):
     if string is None:
         return None
-    return quote(to_utf8(string), safe=to_utf8(""))
+    return _quote_segment(string)
 
 
 def unicode_unquote(string):
     if string is None:
         return None
+    if '%' not in string:
+        return to_unicode(string)
     if six.PY3:
         return unquote(string)
     return to_unicode(unquote(to_utf8(string)))
@@ -97,36 +157,242 @@ def unicode_urlencode(query, doseq=True):
     return xx
 
 
+# A parsed query string.  params is an ordered dict mapping each decoded key
+# to a list of decoded values, and chunks is the list of (key, raw
+# 'key=value' chunk) tuples in their original order.  Keeping the raw chunks
+# means a new query string can be built after changing one key without
+# re-encoding or reordering any of the others.
+_Query = namedtuple("_Query", "params chunks")
+
+
+def _parse_query(query):
+    """
+    Parse a query string into a _Query
+    """
+    params = OrderedDict()
+    chunks = []
+    if query:
+        for chunk in query.split('&'):
+            if not chunk:
+                continue
+            key, _, value = chunk.partition('=')
+            key = _decode_query_component(key)
+            value = _decode_query_component(value)
+            params.setdefault(key, []).append(value)
+            chunks.append((key, chunk))
+    return _Query(params, chunks)
+
+
+def _replace_query_values(query, key, values):
+    """
+    Return a new _Query with the values for the passed key replaced.
+
+    The new values take the place of the key's first occurrence, or are
+    added to the end if the key isn't present.
+    """
+    new_chunks = [(key, _encode_query_pair(key, v)) for v in values]
+    chunks = []
+    for chunk in query.chunks:
+        if chunk[0] != key:
+            chunks.append(chunk)
+        elif new_chunks:
+            chunks.extend(new_chunks)
+            new_chunks = None
+    if new_chunks:
+        chunks.extend(new_chunks)
+    params = OrderedDict(query.params)
+    if values:
+        params[key] = list(values)
+    else:
+        params.pop(key, None)
+    return _Query(params, chunks)
+
+
+def _iter_query(query):
+    """
+    Lazily yield the raw (key, value) pairs of a query string
+    """
+    if not query:
+        return
+    start = 0
+    length = len(query)
+    while start <= length:
+        end = query.find('&', start)
+        if end == -1:
+            end = length
+        if end > start:
+            key, _, value = query[start:end].partition('=')
+            yield key, value
+        start = end + 1
+
+
+def _decode_query_component(string):
+    if '%' in string or '+' in string:
+        return unicode_unquote(string.replace('+', ' '))
+    return string
+
+
+def _encode_query_pair(key, value):
+    """
+    Encode a (key, value) pair in the same way as urlencode
+    """
+    return '%s=%s' % (quote_plus(to_utf8(key)), quote_plus(to_utf8(value)))
+
+
+# Parsed URL strings keyed on the string.  This is disabled by default as
+# it only helps when the same URLs are parsed repeatedly: enable it with
+# ``parse_cache.resize(n)`` and read the hit and miss counters with
+# ``parse_cache.info()``.
+parse_cache = LRUCache(maxsize=0)
+
+
 def parse(url_str):
     """
     Extract all parts from a URL string and return them as a dictionary
     """
-    url_str = to_unicode(url_str)
-    result = urlparse(url_str)
-    netloc_parts = result.netloc.rsplit('@', 1)
-    if len(netloc_parts) == 1:
-        username = password = None
-        host = netloc_parts[0]
+    return parse_cache.get(url_str, _parse)._asdict()
+
+
+def _parse_encoded(url_str):
+    """
+    Parse a URL string into a _URLTuple with its components %-encoded in the
+    same way as the URL constructor
+    """
+    params = parse_cache.get(url_str, _parse)
+    return params._replace(
+        username=unicode_quote(params.username),
+        password=unicode_quote(params.password),
+        fragment=unicode_quote(params.fragment))
+
+
+# Scanning patterns
+_scheme_pattern = re.compile(r"[A-Za-z][A-Za-z0-9+.-]*:")
+_netloc_end = re.compile(r"[/?#]")
+_port_pattern = re.compile(r"[0-9]+\Z")
+# Characters stripped by urlsplit (see the WHATWG URL standard)
+_leading_junk = ''.join(chr(i) for i in range(33))
+_unsafe_chars = re.compile(r"[\t\r\n]")
+
+
+def _parse(url_str):
+    """
+    Extract all parts from a URL string and return them as a _URLTuple
+
+    This does a single left-to-right scan, finding each component boundary
+    in turn, and follows the same rules as ``urlsplit``.
+    """
+    url_str = to_unicode(url_str).lstrip(_leading_junk)
+    if '\t' in url_str or '\r' in url_str or '\n' in url_str:
+        url_str = _unsafe_chars.sub('', url_str)
+
+    # Scheme
+    scheme = ''
+    start = 0
+    match = _scheme_pattern.match(url_str)
+    if match is not None:
+        start = match.end()
+        scheme = url_str[:start - 1].lower()
+
+    # Authority
+    netloc = None
+    if url_str.startswith('//', start):
+        match = _netloc_end.search(url_str, start + 2)
+        end = len(url_str) if match is None else match.start()
+        netloc = url_str[start + 2:end]
+        start = end
+
+    # Path, query and fragment
+    end = url_str.find('#', start)
+    if end == -1:
+        end = len(url_str)
+        fragment = ''
     else:
-        user_and_pass = netloc_parts[0].split(':')
-        if len(user_and_pass) == 2:
-            username, password = user_and_pass
-        elif len(user_and_pass) == 1:
-            username = user_and_pass[0]
+        fragment = url_str[end + 1:]
+    query_start = url_str.find('?', start, end)
+    if query_start == -1:
+        path = url_str[start:end]
+        query = ''
+    else:
+        path = url_str[start:query_start]
+        query = url_str[query_start + 1:end]
+
+    if netloc is None:
+        return _URLTuple('', None, None, scheme, None, path, query, fragment)
+
+    if ('[' in netloc) != (']' in netloc):
+        raise ValueError("Invalid IPv6 URL")
+
+    # Split the authority into credentials, host and port
+    userinfo, has_userinfo, hostinfo = netloc.rpartition('@')
+    username = password = None
+    if has_userinfo:
+        username, has_password, password = userinfo.partition(':')
+        if not has_password:
             password = None
-        host = netloc_parts[1]
+    host, port = _split_hostinfo(hostinfo)
+    return _URLTuple(host, username, password, scheme, port, path, query,
+                     fragment)
+
+
+def _split_hostinfo(hostinfo):
+    """
+    Split a 'host[:port]' string into the host and integer port (or None)
+    """
+    if hostinfo.startswith('['):
+        # IPv6 literal
+        close = hostinfo.find(']') + 1
+        if not close or hostinfo[close:close + 1] not in ('', ':'):
+            raise ValueError("Invalid IPv6 URL")
+        host, port = hostinfo[:close], hostinfo[close + 1:]
+        has_port = hostinfo[close:close + 1] == ':'
+    else:
+        host, has_port, port = hostinfo.partition(':')
+    if has_port and port:
+        return host, _parse_port(port)
+    return host, None
+
+
+def _parse_port(port):
+    """
+    Convert a port string to an integer, raising ValueError if it isn't valid
+    """
+    if _port_pattern.match(port) is None:
+        raise ValueError(
+            "Port could not be cast to integer value as %r" % port)
+    port = int(port)
+    if port > 65535:
+        raise ValueError("Port out of range 0-65535")
+    return port
 
-    if host and ':' in host:
-        host = host.split(':')[0]
 
-    return {'host': host,
-            'username': username,
-            'password': password,
-            'scheme': result.scheme,
-            'port': result.port,
-            'path': result.path,
-            'query': result.query,
-            'fragment': result.fragment}
+def _encode_changes(changes):
+    """
+    Encode a dict of new component values and apply the constructor's
+    defaults, ready for replacing the components of a _URLTuple
+    """
+    for key in ('username', 'password', 'fragment'):
+        if key in changes:
+            changes[key] = unicode_quote(changes[key])
+    if 'scheme' in changes and changes['scheme'] is None:
+        changes['scheme'] = 'http'
+    if 'path' in changes:
+        path = changes['path']
+        if path is None:
+            changes['path'] = '/'
+        elif path and not path.startswith('/'):
+            changes['path'] = '/' + path
+    return changes
+
+
+def _with_absolute_path(url_tuple):
+    """
+    Ensure the path of a _URLTuple starts with a slash, as the constructor
+    does, so it can't run into the host
+    """
+    path = url_tuple.path
+    if path and not path.startswith('/'):
+        return url_tuple._replace(path='/' + path)
+    return url_tuple
 
 
 class URL(object):
@@ -145,12 +411,31 @@ class URL(object):
 
     If you pass both a URL string and keyword args, then the values of keyword
     args take precedence.
+
+    Passing ``lazy=True`` with just a URL string defers parsing until a
+    component is first needed, which makes passing URLs through untouched
+    almost free.  Until then, ``as_string()`` returns the original string::
+
+        >>> URL('http://www.google.com/search?', lazy=True).as_string()
+        'http://www.google.com/search?'
     """
 
-    __slots__ = ("_tuple",)
+    # _string holds the serialised URL once it has been built, or the original
+    # string of a lazy instance, whose _tuple slot is left unset until first
+    # accessed.  _query holds the parsed query (see _parse_query) and _hash the
+    # hash of _tuple; both are left unset until first needed.
+    __slots__ = ("_tuple", "_string", "_query", "_hash")
 
     def __init__(self, url_str=None, host=None, username=None, password=None,
-                 scheme=None, port=None, path=None, query=None, fragment=None):
+                 scheme=None, port=None, path=None, query=None, fragment=None,
+                 lazy=False):
+        self._string = None
+        if lazy and url_str is not None and all(
+                arg is None for arg in (host, username, password, scheme,
+                                        port, path, query, fragment)):
+            self._string = to_unicode(url_str)
+            return
+
         if url_str is not None:
             params = parse(url_str)
         else:
@@ -183,6 +468,20 @@ class URL(object):
                                 params['query'],
                                 unicode_quote(params['fragment']))
 
+    def __getattr__(self, name):
+        # Only called when a slot is unset, so used to fill the lazy slots on
+        # first access
+        if name == '_query':
+            self._query = _parse_query(self._tuple.query)
+            return self._query
+        if name == '_hash':
+            self._hash = hash(self._tuple)
+            return self._hash
+        if name != '_tuple' or self._string is None:
+            raise AttributeError(name)
+        self._tuple = _parse_encoded(self._string)
+        return self._tuple
+
     def __eq__(self, other):
         return self._tuple == other._tuple
 
@@ -193,27 +492,31 @@ class URL(object):
         return tuple(self._tuple)
 
     def __setstate__(self, state):
+        self._string = None
         self._tuple = _URLTuple(*state)
 
     def __hash__(self):
-        return hash(self._tuple)
+        return self._hash
 
     def __repr__(self):
         return str(self._tuple)
 
     def __unicode__(self):
-        url = self._tuple
-        parts = ["%s://" % url.scheme if url.scheme else '',
-                 self.netloc(),
-                 url.path,
-                 '?%s' % url.query if url.query else '',
-                 '#%s' % url.fragment if url.fragment else '']
-        if not url.host:
-            return ''.join(parts[2:])
-        return ''.join(parts)
+        if self._string is None:
+            self._string = self._build_string()
+        return self._string
 
     __str__ = as_string = __unicode__
 
+    def as_bytes(self, encoding='utf8'):
+        """
+        Return the URL as a bytestring, eg for writing to a socket
+
+        The components are already %-encoded so this is a single encode of
+        the (cached) string.
+        """
+        return self.as_string().encode(encoding)
+
     # Accessors / Mutators
     # These use the jQuery overloading style whereby they become mutators if
     # extra args are passed
@@ -430,9 +733,26 @@ class URL(object):
         """
         Test if a given set of query parameters are present
 
+        The query string is scanned once and no values are decoded.
+
         :param list keys: keys to test for
         """
-        return all([self.has_query_param(k) for k in keys])
+        missing = set(keys)
+        if not missing:
+            return True
+        for key, _ in _iter_query(self._tuple.query):
+            missing.discard(_decode_query_component(key))
+            if not missing:
+                return True
+        return False
+
+    def iter_query_params(self):
+        """
+        Lazily yield the decoded (key, value) pairs of the query string, in
+        order
+        """
+        for key, value in _iter_query(self._tuple.query):
+            yield _decode_query_component(key), _decode_query_component(value)
 
     def query_param(self, key, value=None, default=None, as_list=False):
         """
@@ -445,53 +765,58 @@ class URL(object):
         :param boolean as_list: whether to return the values as a list
         :param string value: the new query parameter to use
         """
-        parse_result = self.query_params()
         if value is not None:
-            # Need to ensure all strings are unicode
-            if isinstance(value, (list, tuple)):
-                value = list(map(to_unicode, value))
-            else:
-                value = to_unicode(value)
-            parse_result[to_unicode(key)] = value
-            return URL._mutate(
-                self, query=unicode_urlencode(parse_result, doseq=True))
+            if not isinstance(value, (list, tuple)):
+                value = [value]
+            return self._replace_query_values(
+                to_unicode(key), list(map(to_unicode, value)))
 
         try:
-            result = parse_result[key]
+            result = self._query.params[key]
         except KeyError:
             return default
         if as_list:
-            return result
-        return result[0] if len(result) == 1 else result
+            return list(result)
+        return result[0] if len(result) == 1 else list(result)
 
     def append_query_param(self, key, value):
         """
         Append a query parameter
 
+        The encoded parameter is added to the end of the query string without
+        parsing or re-encoding the existing parameters.
+
         :param string key: The query param key
         :param string value: The new value
         """
-        values = self.query_param(key, as_list=True, default=[])
-        values.append(value)
-        return self.query_param(key, values)
+        pair = _encode_query_pair(key, value)
+        query = self._tuple.query
+        return URL._from_tuple(_with_absolute_path(self._tuple._replace(
+            query='%s&%s' % (query, pair) if query else pair)))
 
-    def query_params(self, value=None):
+    def query_params(self, value=None, keys=None):
         """
         Return or set a dictionary of query params
 
+        Pass ``keys`` to only return the params for those keys.  The query
+        string is then scanned once and only the matching values decoded.
+
         :param dict value: new dictionary of values
+        :param list keys: the keys to return
         """
         if value is not None:
             return URL._mutate(self, query=unicode_urlencode(value, doseq=True))
-        query = '' if self._tuple.query is None else self._tuple.query
-
-        # In Python 2.6, urlparse needs a bytestring so we encode and then
-        # decode the result.
-        if not six.PY3:
-            result = parse_qs(to_utf8(query), True)
-            return dict_to_unicode(result)
-
-        return parse_qs(query, True)
+        if keys is not None:
+            keys = set(keys)
+            result = {}
+            for key, raw_value in _iter_query(self._tuple.query):
+                key = _decode_query_component(key)
+                if key in keys:
+                    result.setdefault(key, []).append(
+                        _decode_query_component(raw_value))
+            return result
+        return dict((key, list(values))
+                    for key, values in self._query.params.items())
 
     def remove_query_param(self, key, value=None):
         """
@@ -502,23 +827,82 @@ class URL(object):
         :param string key: The key to delete
         :param string value: The value of the param to delete (of more than one)
         """
-        parse_result = self.query_params()
+        values = list(self._query.params[key])
         if value is not None:
-            index = parse_result[key].index(value)
-            del parse_result[key][index]
+            values.remove(value)
         else:
-            del parse_result[key]
-        return URL._mutate(self, query=unicode_urlencode(parse_result, doseq=True))
+            values = []
+        return self._replace_query_values(key, values)
+
+    def _replace_query_values(self, key, values):
+        """
+        Return a new instance with the values for the passed query key
+        replaced, leaving the other parameters untouched
+        """
+        query = _replace_query_values(self._query, key, values)
+        return URL._from_tuple(_with_absolute_path(
+            self._tuple._replace(
+                query='&'.join(chunk for _, chunk in query.chunks))),
+            query)
 
     # =======
     # Helpers
     # =======
 
+    def _build_string(self):
+        url = self._tuple
+        parts = ["%s://" % url.scheme if url.scheme else '',
+                 self.netloc(),
+                 url.path,
+                 '?%s' % url.query if url.query else '',
+                 '#%s' % url.fragment if url.fragment else '']
+        if not url.host:
+            return ''.join(parts[2:])
+        return ''.join(parts)
+
     @classmethod
     def _mutate(cls, url, **kwargs):
-        args = url._tuple._asdict()
-        args.update(kwargs)
-        return cls(**args)
+        """
+        Return a new instance with the passed components replaced.
+
+        The other components are already %-encoded so are copied across
+        untouched; only the replaced ones are encoded.
+        """
+        return cls._from_tuple(_with_absolute_path(
+            url._tuple._replace(**_encode_changes(kwargs))))
+
+    @classmethod
+    def _from_tuple(cls, url_tuple, query=None):
+        """
+        Create an instance from a _URLTuple whose components are already
+        %-encoded, skipping the parsing and quoting done by the constructor.
+
+        The parsed query can be passed too if it is already known.
+        """
+        instance = cls.__new__(cls)
+        instance._string = None
+        instance._tuple = url_tuple
+        if query is not None:
+            instance._query = query
+        return instance
+
+    def builder(self):
+        """
+        Return a mutable :class:`URLBuilder` initialised from this URL
+
+        Example::
+
+            >>> URL('http://example.com').builder().path_segments(['a', 'b']).query_param('q', 'x').build().as_string()
+            'http://example.com/a/b?q=x'
+        """
+        return URLBuilder(self)
+
+    def compact(self):
+        """
+        Return a :class:`CompactURL` copy of this URL, for holding many URLs
+        in memory
+        """
+        return CompactURL._from_tuple(self._tuple)
 
     @classmethod
     def from_string(cls, url_str):
@@ -528,3 +912,493 @@ class URL(object):
         This method is deprecated now
         """
         return cls(url_str)
+
+    @classmethod
+    def from_bytes(cls, url_bytes, encoding='utf8', lazy=False):
+        """
+        Create a new instance from a bytestring, eg one read from a socket
+
+        The bytes are decoded once, up front, and then parsed directly,
+        skipping the type checks of the constructor.
+
+        :param bytes url_bytes: the URL
+        :param string encoding: the encoding of the bytes
+        :param boolean lazy: defer parsing, as with ``URL(url_str, lazy=True)``
+        """
+        url_str = url_bytes.decode(encoding)
+        if lazy:
+            return cls(url_str, lazy=True)
+        return cls._from_tuple(_parse_encoded(url_str))
+
+    @classmethod
+    def from_wsgi_environ(cls, environ):
+        """
+        Create a new instance for the request described by a WSGI environ
+        dict, without formatting and re-parsing a URL string
+
+        The host and port are taken from the ``Host`` header, falling back to
+        ``SERVER_NAME`` and ``SERVER_PORT`` (omitting the scheme's default
+        port), as described in PEP 3333.  The path is taken as it was sent
+        from ``RAW_URI`` or ``REQUEST_URI`` where the server provides one.
+        """
+        scheme = environ.get('wsgi.url_scheme', 'http')
+        if environ.get('HTTP_HOST'):
+            host, port = _split_hostinfo(to_unicode(environ['HTTP_HOST']))
+        else:
+            host = _bracket_ipv6(to_unicode(environ['SERVER_NAME']))
+            port = _server_port(scheme, environ.get('SERVER_PORT'))
+        raw_uri = environ.get('RAW_URI') or environ.get('REQUEST_URI')
+        if raw_uri and raw_uri.startswith('/'):
+            path, safe = raw_uri.partition('?')[0], _path_safe + '%'
+        else:
+            path = environ.get('SCRIPT_NAME', '') + environ.get('PATH_INFO', '')
+            safe = _path_safe
+        # WSGI strings are latin-1 decoded bytes
+        if six.PY3:
+            path = path.encode('latin-1')
+        return cls._from_tuple(_URLTuple(
+            host, None, None, scheme, port, unicode_quote(path, safe) or '/',
+            to_unicode(environ.get('QUERY_STRING', '')), ''))
+
+    @classmethod
+    def from_asgi_scope(cls, scope):
+        """
+        Create a new instance for the request described by an ASGI HTTP or
+        websocket connection scope, without formatting and re-parsing a URL
+        string
+
+        The host and port are taken from the ``host`` header, falling back to
+        the scope's ``server`` (omitting the scheme's default port).  The
+        path is taken from ``raw_path`` where the server provides it.
+        """
+        scheme = scope.get('scheme') or (
+            'ws' if scope.get('type') == 'websocket' else 'http')
+        host_header = None
+        for name, value in scope.get('headers', ()):
+            if name == b'host':
+                host_header = value.decode('latin-1')
+                break
+        server = scope.get('server')
+        if host_header:
+            host, port = _split_hostinfo(host_header)
+        elif server and server[1] is not None:
+            # The port is None for a unix socket, which has no host
+            host = _bracket_ipv6(server[0])
+            port = _server_port(scheme, server[1])
+        else:
+            host, port = '', None
+        if scope.get('raw_path'):
+            path = unicode_quote(
+                scope['raw_path'].partition(b'?')[0], _path_safe + '%')
+        else:
+            path = scope['path']
+            root_path = scope.get('root_path', '')
+            # Some servers already include the mount point in the path
+            if path != root_path and not path.startswith(root_path + '/'):
+                path = root_path + path
+            path = unicode_quote(path, _path_safe)
+        return cls._from_tuple(_URLTuple(
+            host, None, None, scheme, port, path or '/',
+            scope.get('query_string', b'').decode('latin-1'), ''))
+
+
+# Characters which may appear unescaped in a path (RFC 3986 pchar and '/')
+_path_safe = "/:@!$&'()*+,;="
+
+_default_ports = {'http': 80, 'https': 443, 'ws': 80, 'wss': 443}
+
+
+def _server_port(scheme, port):
+    """
+    Return a server's port as an integer, or None if it's the default for
+    the scheme
+    """
+    if port is None or port == '':
+        return None
+    port = int(port)
+    return None if _default_ports.get(scheme) == port else port
+
+
+def _bracket_ipv6(host):
+    """
+    Return a server's host in the form used in URLs, where IPv6 addresses
+    are bracketed
+    """
+    if ':' in host and not host.startswith('['):
+        return '[%s]' % host
+    return host
+
+
+# Compact URLs
+
+# The components of a _URLTuple which may be None.  Their bits are set in
+# the flags stored alongside a CompactURL's offsets when they are.
+_NULLABLE = ('host', 'username', 'password', 'port', 'query', 'fragment')
+_NULL_BITS = [(1 << i, _URLTuple._fields.index(name))
+              for i, name in enumerate(_NULLABLE)]
+_PORT_IS_INT = 1 << len(_NULLABLE)
+
+# Offsets are packed as the (start, end) of each component followed by the
+# flags, using the smallest integer size that can hold the string's length
+_offset_structs = dict((size, struct.Struct('<17' + code))
+                       for size, code in ((1, 'B'), (2, 'H'), (4, 'I')))
+# For reading the (start, end) of a single component and the flags, keyed
+# on the integer size and then the component's index
+_component_structs = dict(
+    (size, [struct.Struct('<%dx2%s%dx%s' % (
+        index * 2 * size, code, (14 - index * 2) * size, code))
+        for index in range(8)])
+    for size, code in ((1, 'B'), (2, 'H'), (4, 'I')))
+_null_bits_by_index = dict((index, bit) for bit, index in _NULL_BITS)
+
+
+def _pack(url_tuple):
+    """
+    Serialise a _URLTuple as URL.as_string does, returning the string and its
+    packed component offsets, or None if the tuple can't be recovered from
+    the string.
+    """
+    flags = 0
+    values = []
+    for name, value in zip(_URLTuple._fields, url_tuple):
+        if value is None and name in _NULLABLE:
+            flags |= 1 << _NULLABLE.index(name)
+            value = ''
+        elif name == 'port' and isinstance(value, six.integer_types):
+            if not value:
+                return None
+            flags |= _PORT_IS_INT
+            value = '%d' % value
+        elif not isinstance(value, six.text_type):
+            return None
+        values.append(value)
+    host, username, password, scheme, port, path, query, fragment = values
+
+    layout = []
+    if host:
+        if scheme:
+            layout += [('scheme', scheme), (None, '://')]
+        if username:
+            layout.append(('username', username))
+            if password:
+                layout += [(None, ':'), ('password', password)]
+            layout.append((None, '@'))
+        layout.append(('host', host))
+        if port:
+            layout += [(None, ':'), ('port', port)]
+    layout.append(('path', path))
+    if query:
+        layout += [(None, '?'), ('query', query)]
+    if fragment:
+        layout += [(None, '#'), ('fragment', fragment)]
+
+    pieces = []
+    spans = {}
+    length = 0
+    for name, text in layout:
+        if name is not None:
+            spans[name] = (length, length + len(text))
+        pieces.append(text)
+        length += len(text)
+
+    offsets = []
+    for name, value in zip(_URLTuple._fields, values):
+        if name in spans:
+            offsets.extend(spans[name])
+        elif value:
+            # Left out of the string so would be lost
+            return None
+        else:
+            offsets.extend((0, 0))
+    offsets.append(flags)
+    size = 1 if length < 0x100 else 2 if length < 0x10000 else 4
+    return ''.join(pieces), _offset_structs[size].pack(*offsets)
+
+
+def _unpack(string, offsets):
+    """
+    Rebuild the _URLTuple of a packed string
+    """
+    (a, b, c, d, e, f, g, h, i, j, k, l, m, n, o, p,
+     flags) = _offset_structs[len(offsets) // 17].unpack(offsets)
+    parts = [string[a:b], string[c:d], string[e:f], string[g:h],
+             string[i:j], string[k:l], string[m:n], string[o:p]]
+    if flags:
+        for bit, index in _NULL_BITS:
+            if flags & bit:
+                parts[index] = None
+        if flags & _PORT_IS_INT:
+            parts[4] = int(parts[4])
+    return _URLTuple._make(parts)
+
+
+class CompactURL(URL):
+    """
+    A :class:`URL` which stores the URL string plus a small array of
+    component offsets, rather than a tuple of components, so uses around
+    half the memory when many URLs are held at once.
+
+    Components are sliced out of the string on demand, so accessors are a
+    little slower than those of :class:`URL`.  It's constructed in the same
+    way, or from an existing URL with :meth:`URL.compact`::
+
+        >>> u = CompactURL('http://www.google.com/search?q=testing')
+        >>> u.host(), u.query_param('q')
+        ('www.google.com', 'testing')
+
+    Mutator methods return :class:`URL` instances.  The rare URLs whose
+    components can't be recovered from their string (eg relative URLs with
+    a scheme) are stored as a tuple instead.
+    """
+
+    # _offsets is None when the tuple is stored instead
+    __slots__ = ("_offsets",)
+
+    def __init__(self, *args, **kwargs):
+        kwargs.pop('lazy', None)
+        super(CompactURL, self).__init__(*args, **kwargs)
+        url_tuple = self._tuple
+        del self._tuple
+        self._pack(url_tuple)
+
+    def __getattr__(self, name):
+        if name == '_tuple':
+            return _unpack(self._string, self._offsets)
+        if name == '_query':
+            # Not stored, to keep instances small
+            return _parse_query(self._tuple.query)
+        return super(CompactURL, self).__getattr__(name)
+
+    def __eq__(self, other):
+        if (isinstance(other, CompactURL) and self._offsets is not None and
+                other._offsets is not None):
+            # The string and offsets determine the components, and vice versa
+            return (self._string == other._string and
+                    self._offsets == other._offsets)
+        return self._tuple == other._tuple
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = URL.__hash__
+
+    def __setstate__(self, state):
+        self._pack(_URLTuple(*state))
+
+    def _pack(self, url_tuple):
+        packed = _pack(url_tuple)
+        if packed is None:
+            self._string = self._offsets = None
+            self._tuple = url_tuple
+        else:
+            self._string, self._offsets = packed
+
+    @classmethod
+    def _from_tuple(cls, url_tuple, query=None):
+        instance = cls.__new__(cls)
+        instance._pack(url_tuple)
+        return instance
+
+    def compact(self):
+        return self
+
+    # The accessors below slice their component straight out of the string
+    # rather than unpacking every component into a tuple
+
+    def _component(self, index):
+        offsets = self._offsets
+        if offsets is None:
+            return self._tuple[index]
+        start, end, flags = _component_structs[len(offsets) // 17][
+            index].unpack(offsets)
+        if flags:
+            if flags & _null_bits_by_index.get(index, 0):
+                return None
+            if index == 4 and flags & _PORT_IS_INT:
+                return int(self._string[start:end])
+        return self._string[start:end]
+
+    def host(self, value=None):
+        if value is not None:
+            return URL._mutate(self, host=value)
+        return self._component(0)
+
+    domain = host
+
+    def username(self, value=None):
+        if value is not None:
+            return URL._mutate(self, username=value)
+        return unicode_unquote(self._component(1))
+
+    def password(self, value=None):
+        if value is not None:
+            return URL._mutate(self, password=value)
+        return unicode_unquote(self._component(2))
+
+    def scheme(self, value=None):
+        if value is not None:
+            return URL._mutate(self, scheme=value)
+        return self._component(3)
+
+    def port(self, value=None):
+        if value is not None:
+            return URL._mutate(self, port=value)
+        return self._component(4)
+
+    def path(self, value=None):
+        if value is not None:
+            return super(CompactURL, self).path(value)
+        return self._component(5)
+
+    def query(self, value=None):
+        if value is not None:
+            return URL._mutate(self, query=value)
+        return self._component(6)
+
+    def fragment(self, value=None):
+        if value is not None:
+            return URL._mutate(self, fragment=value)
+        return unicode_unquote(self._component(7))
+
+
+class URLBuilder(object):
+    """
+    A mutable counterpart to :class:`URL` for applying many changes before
+    creating a single new instance.
+
+    The setter methods match those of :class:`URL` but modify the builder in
+    place and return it so calls can be chained.  The path is held as a list
+    of segments, which is only encoded when :meth:`build` is called, and the
+    query as its raw parameters, so only the changed parameters are
+    re-encoded and the rest keep their order and encoding.
+    """
+
+    def __init__(self, url=None):
+        if url is None:
+            url = URL()
+        self._parts = url._tuple._asdict()
+        # These are only decoded once they are modified
+        self._segments = None
+        self._trailing_slash = False
+        self._query = None
+
+    def build(self):
+        """
+        Return a new :class:`URL` instance with the changes applied
+        """
+        parts = self._parts
+        if self._segments is not None:
+            path = '/' + '/'.join(
+                map(unicode_quote_path_segment, self._segments))
+            if self._trailing_slash and self._segments:
+                path += '/'
+            parts['path'] = path
+        if self._query is not None:
+            parts['query'] = '&'.join(chunk for _, chunk in self._query.chunks)
+        return URL._from_tuple(_with_absolute_path(_URLTuple(**parts)))
+
+    def _set(self, **kwargs):
+        self._parts.update(_encode_changes(kwargs))
+        return self
+
+    def scheme(self, value):
+        return self._set(scheme=value)
+
+    def host(self, value):
+        return self._set(host=value)
+
+    domain = host
+
+    def username(self, value):
+        return self._set(username=value)
+
+    def password(self, value):
+        return self._set(password=value)
+
+    def port(self, value):
+        return self._set(port=value)
+
+    def fragment(self, value):
+        return self._set(fragment=value)
+
+    # ====
+    # Path
+    # ====
+
+    def _path_segments(self):
+        if self._segments is None:
+            path = self._parts['path'] or ''
+            segments = path.split('/')[1:]
+            self._trailing_slash = path.endswith('/')
+            if self._trailing_slash:
+                segments.pop()
+            self._segments = list(map(unicode_unquote, segments))
+        return self._segments
+
+    def path(self, value):
+        if not value.startswith('/'):
+            value = '/' + value
+        self._segments = None
+        return self._set(path=unicode_quote(value))
+
+    def path_segment(self, index, value):
+        self._path_segments()[index] = to_unicode(value)
+        return self
+
+    def path_segments(self, value):
+        self._segments = list(map(to_unicode, value))
+        self._trailing_slash = False
+        return self
+
+    def add_path_segment(self, value):
+        self._path_segments().append(to_unicode(value))
+        self._trailing_slash = False
+        return self
+
+    # ============
+    # Query params
+    # ============
+
+    def _query_params(self):
+        if self._query is None:
+            self._query = _parse_query(self._parts['query'])
+        return self._query
+
+    def _replace_query_values(self, key, values):
+        self._query = _replace_query_values(
+            self._query_params(), key, values)
+        return self
+
+    def query(self, value):
+        self._query = None
+        return self._set(query=value)
+
+    def query_param(self, key, value):
+        if not isinstance(value, (list, tuple)):
+            value = [value]
+        return self._replace_query_values(
+            to_unicode(key), list(map(to_unicode, value)))
+
+    def append_query_param(self, key, value):
+        # Added to the end of the query, as URL.append_query_param does
+        query = self._query_params()
+        key, value = to_unicode(key), to_unicode(value)
+        params = OrderedDict(query.params)
+        params[key] = params.get(key, []) + [value]
+        self._query = _Query(
+            params, query.chunks + [(key, _encode_query_pair(key, value))])
+        return self
+
+    def query_params(self, value):
+        self._query = _Query(OrderedDict(), [])
+        for key, values in value.items():
+            self.query_param(key, values)
+        return self
+
+    def remove_query_param(self, key, value=None):
+        values = list(self._query_params().params[key])
+        if value is not None:
+            values.remove(value)
+        else:
+            values = []
+        return self._replace_query_values(key, values)
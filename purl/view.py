@@ -0,0 +1,219 @@
+import re
+
+from . import url
+
+
+__all__ = ['URLView', 'iter_views']
+
+
+# Matches the leading whitespace, scheme and authority marker of a line,
+# following the same rules as url._parse
+_head_pattern = re.compile(
+    br"[\x00-\x20]*()(?:([A-Za-z][A-Za-z0-9+.\-]*):)?(//)?")
+_netloc_end = re.compile(br"[/?#]")
+
+
+class URLView(object):
+    """
+    A lightweight view of a URL within a bytes buffer, such as a memory
+    mapped file, created by :func:`iter_views`.
+
+    Only the positions of each component are stored.  A component is
+    decoded when its accessor is called, and returned as
+    :func:`purl.url.parse` would return it.
+    """
+
+    __slots__ = ("_buffer", "_offsets")
+
+    def __init__(self, buffer, offsets):
+        self._buffer = buffer
+        # (start, end) pairs for the line followed by each _URLTuple field,
+        # with -1 as the start of a component which is None
+        self._offsets = offsets
+
+    def __repr__(self):
+        return '<URLView %r>' % self.raw()
+
+    def _component(self, index):
+        start, end = self._offsets[index * 2:index * 2 + 2]
+        if start == -1:
+            return None
+        return url.to_unicode(self._buffer[start:end])
+
+    def raw(self):
+        """
+        Return the bytes of the URL, without surrounding whitespace
+        """
+        return self._buffer[self._offsets[0]:self._offsets[1]]
+
+    def host(self):
+        return self._component(1)
+
+    def username(self):
+        return self._component(2)
+
+    def password(self):
+        return self._component(3)
+
+    def scheme(self):
+        return self._component(4).lower()
+
+    def port(self):
+        port = self._component(5)
+        if not port:
+            return None
+        return url._parse_port(port)
+
+    def path(self):
+        return self._component(6)
+
+    def query(self):
+        return self._component(7)
+
+    def fragment(self):
+        return self._component(8)
+
+    def to_url(self):
+        """
+        Return a :class:`~purl.URL` for the view
+        """
+        return url.URL(url.to_unicode(self.raw()))
+
+
+def iter_views(buffer, scheme=None, host=None):
+    """
+    Lazily yield a :class:`URLView` for each non-blank line of a buffer of
+    newline-separated URLs
+
+    The buffer can be a :class:`mmap.mmap`, ``bytes`` or ``bytearray``.
+    Component boundaries are found directly in the buffer, so no strings are
+    created while scanning.  Passing ``scheme`` or ``host`` (as bytes) skips
+    the URLs which don't match without decoding them.
+
+    As the parser ignores tabs and carriage returns within a URL, the view
+    of a line containing them is over a copy of the line without them.
+
+    Lines aren't validated while scanning: an invalid port raises
+    ``ValueError`` when :meth:`URLView.port` is called, and
+    :meth:`URLView.to_url` applies all the checks of the :class:`~purl.URL`
+    constructor.
+
+    Example::
+
+        >>> views = iter_views(b'http://a.com/x\\nhttps://b.com/y\\n', host=b'b.com')
+        >>> [view.path() for view in views]
+        ['/y']
+    """
+    if scheme is not None:
+        scheme = scheme.lower()
+    length = len(buffer)
+    match_head = _head_pattern.match
+    search_netloc_end = _netloc_end.search
+    find = buffer.find
+    position = 0
+    while position < length:
+        line_end = find(b'\n', position)
+        if line_end == -1:
+            line_end = length
+        head = match_head(buffer, position, line_end)
+        position = line_end + 1
+        line_start = head.start(1)
+        while line_end > line_start and buffer[line_end - 1:line_end] <= b' ':
+            line_end -= 1
+        if line_start == line_end:
+            continue
+        if find(b'\t', line_start, line_end) != -1 or \
+                find(b'\r', line_start, line_end) != -1:
+            # The parser removes these before finding any boundaries, so
+            # scan a copy of the line without them
+            line = buffer[line_start:line_end]
+            for view in iter_views(
+                    line.replace(b'\t', b'').replace(b'\r', b''),
+                    scheme, host):
+                yield view
+            continue
+
+        start = head.end()
+        scheme_start, scheme_end = head.span(2)
+        if scheme_start == -1:
+            scheme_start = scheme_end = line_start
+        if scheme is not None and not _equals(
+                buffer, scheme_start, scheme_end, scheme, lower=True):
+            continue
+
+        offsets = [line_start, line_end]
+        if head.start(3) == -1:
+            if host:
+                continue
+            offsets += [line_start, line_start, -1, -1, -1, -1]
+            port_start = port_end = -1
+        else:
+            match = search_netloc_end(buffer, start, line_end)
+            netloc_end = line_end if match is None else match.start()
+            host_start, host_end, port_start, port_end = _split_authority(
+                buffer, start, netloc_end, offsets)
+            if host is not None and not _equals(
+                    buffer, host_start, host_end, host):
+                continue
+            start = netloc_end
+        offsets += [scheme_start, scheme_end, port_start, port_end]
+
+        # Path, query and fragment
+        fragment_start = find(b'#', start, line_end)
+        path_end = line_end if fragment_start == -1 else fragment_start
+        query_start = find(b'?', start, path_end)
+        if query_start == -1:
+            offsets += [start, path_end, line_end, line_end]
+        else:
+            offsets += [start, query_start, query_start + 1, path_end]
+        if fragment_start == -1:
+            offsets += [line_end, line_end]
+        else:
+            offsets += [fragment_start + 1, line_end]
+        yield URLView(buffer, tuple(offsets))
+
+
+def _split_authority(buffer, start, end, offsets):
+    """
+    Append the host, username and password offsets of the authority between
+    start and end to the passed offsets, returning the host and port spans
+    """
+    at = buffer.rfind(b'@', start, end)
+    if at == -1:
+        userinfo = None
+        host_start = start
+    else:
+        colon = buffer.find(b':', start, at)
+        userinfo = [start, at, -1, -1] if colon == -1 else \
+            [start, colon, colon + 1, at]
+        host_start = at + 1
+
+    host_end = end
+    port_start = port_end = -1
+    close = buffer.find(b']', host_start, end)
+    if buffer.find(b'[', host_start, end) == host_start and close != -1:
+        # IPv6 literal
+        host_end = close + 1
+        if buffer.find(b':', host_end, end) == host_end:
+            port_start, port_end = host_end + 1, end
+    else:
+        colon = buffer.find(b':', host_start, end)
+        if colon != -1:
+            host_end = colon
+            port_start, port_end = colon + 1, end
+
+    offsets += [host_start, host_end]
+    offsets += userinfo or [-1, -1, -1, -1]
+    return host_start, host_end, port_start, port_end
+
+
+def _equals(buffer, start, end, value, lower=False):
+    """
+    Test whether the bytes between start and end equal the passed value
+    without copying them unless they may differ in case
+    """
+    if end - start != len(value):
+        return False
+    if not value or buffer.find(value, start, end) == start:
+        return True
+    return lower and buffer[start:end].lower() == value
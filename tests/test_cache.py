@@ -0,0 +1,76 @@
+from purl.cache import LRUCache
+from purl import template, url, URL
+
+
+class TestLRUCache:
+
+    def test_loader_called_once_per_key(self):
+        calls = []
+        cache = LRUCache(maxsize=2)
+        loader = lambda key: calls.append(key) or key.upper()
+        assert 'A' == cache.get('a', loader)
+        assert 'A' == cache.get('a', loader)
+        assert ['a'] == calls
+        assert (1, 1) == (cache.hits, cache.misses)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(maxsize=2)
+        cache.get('a', str.upper)
+        cache.get('b', str.upper)
+        cache.get('a', str.upper)
+        cache.get('c', str.upper)
+        assert ['a', 'c'] == list(cache._data)
+
+    def test_zero_size_disables_cache(self):
+        cache = LRUCache(maxsize=0)
+        cache.get('a', str.upper)
+        assert 0 == len(cache)
+        assert (0, 0) == (cache.hits, cache.misses)
+
+    def test_resize_evicts_excess_entries(self):
+        cache = LRUCache(maxsize=3)
+        for key in 'abc':
+            cache.get(key, str.upper)
+        cache.resize(1)
+        assert ['c'] == list(cache._data)
+
+    def test_clear_resets_counters(self):
+        cache = LRUCache()
+        cache.get('a', str.upper)
+        cache.clear()
+        assert (0, 0, 128, 0) == cache.info()
+
+
+class TestTemplateCache:
+
+    def test_expand_reuses_compiled_template(self):
+        template.cache.clear()
+        template.expand('{/var}', {'var': 'a'})
+        template.expand('{/var}', {'var': 'b'})
+        info = template.cache.info()
+        assert (1, 1) == (info.hits, info.misses)
+
+
+class TestParseCache:
+
+    def teardown_method(self):
+        url.parse_cache.resize(0)
+        url.parse_cache.clear()
+
+    def test_disabled_by_default(self):
+        URL('http://example.com/a')
+        URL('http://example.com/a')
+        assert (0, 0, 0, 0) == url.parse_cache.info()
+
+    def test_repeated_urls_are_parsed_once(self):
+        url.parse_cache.resize(10)
+        first = URL('http://user@example.com:8000/a?b=c#d')
+        second = URL('http://user@example.com:8000/a?b=c#d')
+        assert first == second
+        info = url.parse_cache.info()
+        assert (1, 1, 1) == (info.hits, info.misses, info.currsize)
+
+    def test_returned_dicts_are_not_shared(self):
+        url.parse_cache.resize(10)
+        url.parse('http://example.com/')['host'] = 'other.com'
+        assert 'example.com' == url.parse('http://example.com/')['host']
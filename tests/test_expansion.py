@@ -3,7 +3,7 @@ import collections
 
 import pytest
 
-from purl.template import expand
+from purl.template import expand, Template
 
 # Define variables as in the RFC (http://tools.ietf.org/html/rfc6570)
 level1_vars = {
@@ -122,3 +122,29 @@ def test_assert_expansion(template, fields, expected):
 
 def test_unicode():
     expand('{/name}', {'name': u'⚐ hello'})
+
+
+@pytest.mark.parametrize("template, fields, expected", data)
+def test_batch_expansion(template, fields, expected):
+    results = Template(template).expand_many([fields], as_string=True)
+    assert [expected] == list(results)
+
+
+@pytest.mark.parametrize("template, fields, expected", data)
+def test_partial_expansion(template, fields, expected):
+    keys = sorted(fields)
+    for fixed_keys in (keys, keys[::2], keys[1::2]):
+        fixed = dict((key, fields[key]) for key in fixed_keys)
+        free = dict((key, fields[key]) for key in keys if key not in fixed)
+        partial = Template(template).partial(**fixed)
+        assert [expected] == list(partial.expand_many([free], as_string=True))
+
+
+@pytest.mark.parametrize("template, fields, expected", data)
+def test_match_reverses_expansion(template, fields, expected):
+    variables = Template(template).match(expected)
+    if variables is None:
+        # Exploded associative values can't be matched positionally
+        assert '*' in template and '=' in expected
+    else:
+        assert expand(template, variables) == expected
@@ -0,0 +1,57 @@
+import re
+
+from purl import QueryFilter, URL
+
+
+class TestQueryFilter:
+
+    def setup_method(self):
+        self.filter = QueryFilter(
+            names=['fbclid', 'gclid'], prefixes=['utm_'],
+            patterns=[r'ref\d+$', re.compile('_hs')])
+
+    def test_matches(self):
+        assert self.filter.matches('fbclid')
+        assert self.filter.matches('utm_campaign')
+        assert self.filter.matches('ref12')
+        assert self.filter.matches('_hsenc')
+        assert not self.filter.matches('ref')
+        assert not self.filter.matches('id')
+        assert not self.filter.matches('x_utm_source')
+
+    def test_keeps_pattern_flags(self):
+        f = QueryFilter(patterns=[re.compile('utm_', re.I), '(?i)fbclid'])
+        assert f.matches('UTM_source')
+        assert f.matches('FBCLID')
+        assert '/?id=1' == f.apply('/?UTM_source=a&id=1&FbClid=b').as_string()
+
+    def test_removes_matching_params(self):
+        u = self.filter.apply(
+            'http://example.com/?utm_source=a&id=1&fbclid=b&q=x%20y&ref1=c#top')
+        assert 'http://example.com/?id=1&q=x%20y#top' == u.as_string()
+
+    def test_matches_decoded_keys(self):
+        assert '' == self.filter.apply('/?utm%5Fsource=a').query()
+
+    def test_keeps_the_path_absolute(self):
+        assert '/foo?id=1' == self.filter.apply('foo?utm_a=1&id=1').as_string()
+
+    def test_returns_same_instance_when_nothing_removed(self):
+        u = URL('http://example.com/?id=1')
+        assert u is self.filter.apply(u)
+
+    def test_absent_keys_are_ignored(self):
+        assert 'http://example.com/' == \
+            self.filter.apply('http://example.com/').as_string()
+
+    def test_accepts_bytes(self):
+        assert '/?id=1' == self.filter.apply(b'/?utm_a=1&id=1').as_string()
+        assert '/' == self.filter.apply(b'/').as_string()
+
+    def test_empty_filter(self):
+        assert 'a=1' == QueryFilter().apply_query('a=1')
+
+    def test_apply_many(self):
+        urls = ['/a?gclid=1', URL('/b?id=2&utm_medium=x'), '/c']
+        assert ['/a', '/b?id=2', '/c'] == [
+            u.as_string() for u in self.filter.apply_many(urls)]
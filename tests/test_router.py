@@ -0,0 +1,95 @@
+from purl import Router, Template, URL
+
+
+class TestRouter:
+
+    def setup_method(self):
+        self.router = Router()
+        self.router.add('/users', 'user-list')
+        self.router.add('/users/{id}', 'user-detail')
+        self.router.add('/users/{id}/posts{/post_id}{?page}', 'user-posts')
+        self.router.add('/users/me', 'current-user')
+        self.router.add('/files{/path*}', 'files')
+        self.router.add('http://api.example.com/v1{/resource}', 'api')
+
+    def test_resolves_literal_path(self):
+        assert ('user-list', {}) == self.router.resolve('/users')
+
+    def test_resolves_wildcard_segment(self):
+        assert ('user-detail', {'id': '42'}) == self.router.resolve(
+            '/users/42')
+
+    def test_prefers_literal_segments(self):
+        assert ('current-user', {}) == self.router.resolve('/users/me')
+
+    def test_resolves_optional_segments_and_query(self):
+        assert ('user-posts', {'id': '42'}) == self.router.resolve(
+            '/users/42/posts')
+        assert ('user-posts', {'id': '42', 'post_id': '7', 'page': '2'}) == \
+            self.router.resolve('/users/42/posts/7?page=2')
+
+    def test_resolves_templates_the_trie_cannot_index(self):
+        assert ('files', {'path': ['a', 'b.txt']}) == self.router.resolve(
+            '/files/a/b.txt')
+
+    def test_relative_templates_match_absolute_urls(self):
+        assert ('user-detail', {'id': '1'}) == self.router.resolve(
+            URL('http://example.com/users/1'))
+
+    def test_absolute_templates_match_on_host(self):
+        assert ('api', {'resource': 'orders'}) == self.router.resolve(
+            'http://api.example.com/v1/orders')
+        assert self.router.resolve('http://other.com/v1/orders') is None
+
+    def test_returns_none_when_nothing_matches(self):
+        assert self.router.resolve('/groups/1') is None
+        assert self.router.resolve('/users/1/comments') is None
+
+    def test_variable_authority_is_matched(self):
+        self.router.add('http://{host}/status', 'status')
+        assert ('status', {'host': 'example.com'}) == self.router.resolve(
+            'http://example.com/status')
+
+    def test_exploded_segments_are_indexed_under_their_prefix(self):
+        router = Router()
+        for i in range(3):
+            router.add('/api/res%d{/rest*}' % i, 'res%d' % i)
+        api = router._roots[''].children['api']
+        assert not api.partial_routes
+        for i in range(3):
+            node = api.children['res%d' % i]
+            assert ['res%d' % i] == [
+                target for _, target in node.partial_routes]
+        assert ('res1', {'rest': ['a', 'b']}) == router.resolve(
+            '/api/res1/a/b')
+
+    def test_matchers_are_compiled_on_first_use(self):
+        router = Router()
+        detail, listing = Template('/a/{id}'), Template('/b')
+        router.add(detail)
+        router.add(listing)
+        assert detail._matcher is None and listing._matcher is None
+        router.resolve('/a/1')
+        assert detail._matcher is not None and listing._matcher is None
+
+    def test_defaults_target_to_template(self):
+        router = Router()
+        template = Template('/a{/b}')
+        router.add(template)
+        assert (template, {'b': 'c'}) == router.resolve('/a/c')
+        assert 1 == len(router)
+
+
+class TestReservedExpansionRoutes:
+
+    def setup_method(self):
+        self.router = Router()
+        self.router.add('/files/{+path}', 'files')
+        self.router.add('/files{/list*}', 'catch-all')
+        self.router.add('/docs/{+p}/edit', 'edit')
+
+    def test_reserved_expansion_spans_segments(self):
+        assert ('files', {'path': 'a/b'}) == self.router.resolve('/files/a/b')
+
+    def test_literal_after_reserved_expansion(self):
+        assert ('edit', {'p': 'a/b'}) == self.router.resolve('/docs/a/b/edit')
@@ -1,3 +1,5 @@
+import pytest
+
 import purl
 
 
@@ -13,3 +15,137 @@ class TestTemplate:
             'https://api.github.com/repos/codeinthehole/purl/labels{/name}')
         url = template.expand()
         assert 'https://api.github.com/repos/codeinthehole/purl/labels' == url.as_string()
+
+    def test_template_is_compiled_once(self):
+        template = purl.Template('http://example.com{/list*}{?q}')
+        assert 'http://example.com' == template._nodes[0]
+        assert ('list', True) == (
+            template._nodes[1].variables[0][0],
+            template._nodes[1].variables[0][2])
+
+    def test_repeated_expansion_gives_same_result(self):
+        template = purl.Template('http://example.com{/list*}{?q}')
+        for q in ('a', 'b'):
+            url = template.expand({'list': ['red', 'green'], 'q': q})
+            assert 'http://example.com/red/green?q=%s' % q == url.as_string()
+
+    def test_expand_many_yields_urls(self):
+        template = purl.Template('http://example.com{/name}{?page}')
+        urls = template.expand_many(
+            [{'name': 'a'}, {'name': 'b', 'page': 2}])
+        assert ['http://example.com/a', 'http://example.com/b?page=2'] == [
+            u.as_string() for u in urls]
+
+    def test_expand_many_can_yield_strings(self):
+        template = purl.Template('{/list*}')
+        results = template.expand_many(
+            [{'list': ['a', 'b']}, {}], as_string=True)
+        assert ['/a/b', ''] == list(results)
+
+    def test_expand_many_is_lazy(self):
+        def rows():
+            yield {'name': 'a'}
+            raise AssertionError("Consumed too eagerly")
+        results = purl.Template('{/name}').expand_many(rows(), as_string=True)
+        assert '/a' == next(results)
+
+    def test_expansion_without_reparsing(self):
+        template = purl.Template(
+            'https://user@api.example.com:8443/repos{/owner,repo}{?page,sort}')
+        variables = {'owner': 'codeinthehole', 'repo': 'purl', 'page': 2}
+        url = template.expand(variables, reparse=False)
+        assert url == template.expand(variables)
+        assert 'api.example.com' == url.host()
+        assert 8443 == url.port()
+        assert '/repos/codeinthehole/purl' == url.path()
+        assert 'page=2' == url.query()
+
+    def test_literal_authority_is_not_reparsed_by_default(self, monkeypatch):
+        template = purl.Template('http://example.com{/name}{?q}')
+        expected = template.expand({'name': 'a b', 'q': 'c'}, reparse=True)
+
+        def fail(url_str):
+            raise AssertionError("Parsed %r" % url_str)
+        monkeypatch.setattr(purl.url, '_parse', fail)
+        assert expected == template.expand({'name': 'a b', 'q': 'c'})
+        with pytest.raises(AssertionError):
+            template.expand({'name': 'a b', 'q': 'c'}, reparse=True)
+
+    def test_expansion_without_reparsing_routes_fragment(self):
+        template = purl.Template('http://example.com{/name}{?q}{#section}')
+        url = template.expand(
+            {'name': 'a', 'q': 'b', 'section': 'Hello World!'}, reparse=False)
+        assert 'http://example.com/a?q=b#Hello%20World!' == url.as_string()
+        assert 'Hello World!' == url.fragment()
+
+    def test_expansion_without_reparsing_routes_literal_query(self):
+        template = purl.Template('http://example.com/search?fixed=yes{&q}')
+        url = template.expand({'q': 'x'}, reparse=False)
+        assert 'fixed=yes&q=x' == url.query()
+
+    def test_variable_authority_falls_back_to_parsing(self):
+        template = purl.Template('http://{host}/path')
+        url = template.expand({'host': 'example.com'}, reparse=False)
+        assert 'http://example.com/path' == url.as_string()
+
+    def test_expand_many_without_reparsing(self):
+        template = purl.Template('http://example.com{/name}')
+        urls = template.expand_many([{'name': 'a'}], reparse=False)
+        assert ['http://example.com/a'] == [u.as_string() for u in urls]
+
+    def test_partial_folds_fixed_variables_into_literals(self):
+        template = purl.Template('{scheme}://{host}/api{/version,resource}')
+        partial = template.partial(
+            scheme='https', host='example.com', version='v2')
+        assert 'https://example.com/api/v2' == partial._nodes[0]
+        url = partial.expand({'resource': 'users'})
+        assert 'https://example.com/api/v2/users' == url.as_string()
+
+    def test_partial_keeps_separator_for_free_variables(self):
+        template = purl.Template('/search{?q,page,lang}')
+        partial = template.partial(q='term', lang='en')
+        assert '/search?q=term&lang=en' == partial.expand().as_string()
+        assert '/search?q=term&page=2&lang=en' == partial.expand(
+            {'page': 2}).as_string()
+
+    def test_partial_with_fixed_authority_expands_without_reparsing(self):
+        template = purl.Template('{scheme}://{host}{/path}')
+        partial = template.partial(scheme='https', host='example.com')
+        url = partial.expand({'path': 'a'}, reparse=False)
+        assert 'https://example.com/a' == url.as_string()
+
+    def test_match_extracts_variables(self):
+        template = purl.Template('http://example.com/repos{/owner,repo}{?page}')
+        assert {'owner': 'codeinthehole', 'repo': 'purl', 'page': '2'} == \
+            template.match('http://example.com/repos/codeinthehole/purl?page=2')
+
+    def test_match_accepts_url_instances(self):
+        template = purl.Template('http://example.com{/path*}')
+        url = purl.URL('http://example.com/a/b%20c')
+        assert {'path': ['a', 'b c']} == template.match(url)
+
+    def test_match_returns_none_for_non_matching_url(self):
+        template = purl.Template('http://example.com/users{/id}')
+        assert template.match('http://example.com/groups/1') is None
+        assert template.match('http://example.com/users/1/2') is None
+
+    def test_match_rejects_unknown_query_params(self):
+        template = purl.Template('/search{?q}')
+        assert {'q': 'term'} == template.match('/search?q=term')
+        assert template.match('/search?q=term&x=1') is None
+
+    def test_match_decodes_plus_in_query_values(self):
+        template = purl.Template('/search{?q}')
+        url = purl.URL('/search').query_param('q', 'a b')
+        assert {'q': 'a b'} == template.match(url)
+
+    def test_match_accepts_unescaped_path_characters(self):
+        template = purl.Template('/x/{id}')
+        assert {'id': 'a@b'} == template.match('/x/a@b')
+        assert {'id': 'a:b'} == template.match('/x/a:b')
+        assert template.match('/x/a/b') is None
+
+    def test_match_on_partial_template(self):
+        template = purl.Template('/search{?q,page,lang}').partial(lang='en')
+        assert {'q': 'a', 'page': '2'} == template.match(
+            '/search?q=a&page=2&lang=en')
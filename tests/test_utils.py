@@ -1,4 +1,13 @@
-from purl.url import to_utf8, to_unicode
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+import pytest
+
+from purl.url import (
+    to_utf8, to_unicode, unicode_quote, unicode_quote_path_segment,
+    unicode_unquote)
 
 
 class TestUnicodeHelper:
@@ -8,3 +17,29 @@ class TestUnicodeHelper:
 
     def test_convert_int_to_unicode(self):
         assert u'1024' == to_unicode(1024)
+
+
+class TestQuoting:
+
+    @pytest.mark.parametrize("safe", ['/', '', '/!,.;'])
+    @pytest.mark.parametrize("string", [
+        u'', u'plain-text_1.0~', u'a b/c,d;e!f', u'caf\xe9 \u20ac', u'%41',
+        u'\x00\x7f?#&=+@:', b'\xff\x00 a', 8080])
+    def test_matches_urllib_quote(self, string, safe):
+        expected = quote(to_utf8(string), to_utf8(safe))
+        assert expected == unicode_quote(string, safe)
+        assert expected == unicode_quote(string, safe)  # cached
+
+    def test_returns_strings_needing_no_escaping_unchanged(self):
+        string = u'nothing-to-escape'
+        assert string is unicode_quote(string)
+
+    def test_path_segment(self):
+        assert u'a%2Fb%20c' == unicode_quote_path_segment(u'a/b c')
+        assert unicode_quote_path_segment(None) is None
+
+    def test_unquote(self):
+        assert u'a b' == unicode_unquote(u'a%20b')
+        assert u'caf\xe9' == unicode_unquote(u'caf%C3%A9')
+        assert u'plain' == unicode_unquote(u'plain')
+        assert unicode_unquote(None) is None
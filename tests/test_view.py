@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import mmap
+
+import pytest
+
+from purl import URL, iter_views
+from purl.url import parse
+
+from . import test_url
+
+
+lines = [line for line in test_url.TestParse.urls if line.strip()] + [
+    'HTTPS://user:@example.com:8080?q=1',
+    u'http://例え.jp/パス',
+    'http://user@[::1]/a#b#c',
+]
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    path = tmp_path / 'urls.txt'
+    path.write_bytes(b'\n'.join(line.encode('utf8') for line in lines) +
+                     b'\r\n\n')
+    with open(str(path), 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        yield mapped
+        mapped.close()
+
+
+def test_views_match_parse(buffer):
+    views = list(iter_views(buffer))
+    assert len(lines) == len(views)
+    for line, view in zip(lines, views):
+        expected = parse(line)
+        for name in ('scheme', 'host', 'username', 'password', 'port',
+                     'path', 'query', 'fragment'):
+            assert expected[name] == getattr(view, name)(), (line, name)
+        assert URL(line) == view.to_url()
+
+
+def test_raw_strips_whitespace():
+    view, = iter_views(b'  http://example.com/\t\r\n')
+    assert b'http://example.com/' == view.raw()
+
+
+@pytest.mark.parametrize("line", [
+    'a\t:x', 'ht\rtp://exa\tmple.com/p\ta?q#f\r', 'http://a.com\t:80/'])
+def test_tabs_and_carriage_returns_are_ignored(line):
+    view, = iter_views(line.encode('ascii'))
+    expected = parse(line)
+    for name in ('scheme', 'host', 'port', 'path', 'query', 'fragment'):
+        assert expected[name] == getattr(view, name)(), name
+    assert URL(line) == view.to_url()
+
+
+def test_filters_on_scheme_and_host(buffer):
+    assert ['/Path'] == [
+        v.path() for v in iter_views(buffer, scheme=b'http', host=b'Example.COM')]
+    assert 3 == len(list(iter_views(buffer, scheme=b'https')))
+    assert 2 == len(list(iter_views(buffer, host=b'[::1]')))
+
+
+def test_invalid_ports_raise_on_access():
+    view, = iter_views(b'http://example.com:port/')
+    assert 'example.com' == view.host()
+    with pytest.raises(ValueError):
+        view.port()